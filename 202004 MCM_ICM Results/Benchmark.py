@@ -0,0 +1,393 @@
+import os
+import time
+import json
+import random
+import fitz
+import numpy as np
+from tqdm import tqdm
+from Parser import PrizeParser, create_logger
+from Ocr import create_ocr_engine
+
+FIELDS = ["student1", "student2", "student3", "advisor_type", "advisor", "school", "prize"]
+
+# for synthetic certificates, see synthetic_certificate()
+FIRST_NAMES = ["Alice", "Bob", "Carol", "David", "Emma", "Frank", "Grace", "Henry", "Ivy", "Jack", "Kevin", "Linda",
+               "Wei", "Jing", "Hao", "Yue", "Zhiyuan", "Xiaoming", "Priya", "Rahul", "Sofia", "Lucas", "Mateo", "Anna"]
+LAST_NAMES = ["Smith", "Johnson", "Brown", "Taylor", "Wilson", "Clark", "Lewis", "Walker", "Young", "King",
+              "Wang", "Li", "Zhang", "Liu", "Chen", "Yang", "Huang", "Zhao", "Patel", "Kumar", "Garcia", "Muller"]
+SCHOOLS = ["Shanghai Jiao Tong University", "Tsinghua University", "Peking University", "Zhejiang University",
+           "Duke University", "University of Washington", "University of Colorado Boulder", "Harvey Mudd College",
+           "University of Electronic Science and Technology of China", "National University of Singapore",
+           "Beijing University of Posts and Telecommunications", "University of Oxford"]
+PRIZES = ["Outstanding Winner", "Finalist", "Meritorious Winner", "Honorable Mention", "Successful Participant"]
+_CERT_PAGE = (792, 612)  # width, height in points (Letter, landscape)
+_CERT_CENTER = 450  # x of the centered lines, in points
+
+
+def latency_str(latencies):
+    """
+    :param latencies:   <list> of <float> seconds
+    :return:            <str> mean / p50 / p95 / max in milliseconds
+    """
+    if not latencies:
+        return "NONE"
+    lat = np.array(latencies) * 1000.
+    return "mean %.1fms\tp50 %.1fms\tp95 %.1fms\tmax %.1fms" \
+           % (lat.mean(), np.percentile(lat, 50), np.percentile(lat, 95), lat.max())
+
+
+def synthetic_truth(rng):
+    """
+    :param rng:     <random.Random>
+    :return:        <dict> info of a random team (NO team number), as PrizeParser.translate_pdf()
+    """
+    students = ["%s %s" % (rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)) for _ in range(rng.randint(1, 3))]
+    students += [""] * (3 - len(students))
+    return {"student1": students[0], "student2": students[1], "student3": students[2],
+            "advisor_type": rng.choice(["Faculty"] * 9 + [None]),  # None for no "With * Advisor" line
+            "advisor": "%s %s" % (rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)),
+            "school": rng.choice(SCHOOLS), "prize": rng.choice(PRIZES)}
+
+
+def synthetic_certificate(truth, path, outlined=False):
+    """
+    write a certificate of the layout of the templates (measured on them at zoom 5):
+        Times 14pt, except the standalone "Of" in 12pt (as the template, so that it is not matched in the first line)
+        and the prize in Times Bold 22pt, each line centered, "Of" on its own line right above the school
+    :param truth:       <dict> info of a team, as returned by synthetic_truth()
+    :param path:        <str> path of the PDF to write
+    :param outlined:    <bool> Whether to keep only the printed page (no text layer), so that it is OCRed
+    """
+    def _line(_y, _text, _size=14, _font="tiro"):  # centered, "_y" is the top of the line
+        page.insertTextbox(fitz.Rect(_CERT_CENTER - 300, _y, _CERT_CENTER + 300, _y + 2 * _size), _text,
+                           fontname=_font, fontsize=_size, align=1)
+
+    pdf = fitz.open()
+    page = pdf.newPage(width=_CERT_PAGE[0], height=_CERT_PAGE[1])
+    _line(96, "Be It Known That The Team Of")
+    y = 126
+    for student in [truth["student1"], truth["student2"], truth["student3"]]:
+        if student:
+            _line(y, student)
+            y += 20
+    if truth["advisor_type"]:
+        _line(201, "With %s Advisor" % truth["advisor_type"])
+    _line(226, truth["advisor"])
+    _line(256, "Of", 12)
+    _line(281, truth["school"])
+    _line(316, "Was Designated As")
+    _line(354, truth["prize"], 22, "tibo")
+
+    if outlined:
+        pm = page.getPixmap(matrix=fitz.Matrix(4, 4), alpha=False)
+        pdf.close()
+        pdf = fitz.open()
+        page = pdf.newPage(width=_CERT_PAGE[0], height=_CERT_PAGE[1])
+        page.insertImage(page.rect, pixmap=pm)
+    pdf.save(path)
+    pdf.close()
+
+
+def generate_certificates(out_path, count=100, seed=0, first_team=2000000, outlined=False):
+    """
+    write synthetic certificates "<team number>.pdf", along with "truth.json" of their info
+    :param out_path:    <str> path of the PDFs, e.g. parser.files_path
+    :param count:       <int> number of certificates
+    :param seed:        <int> seed of the random info, the same seed gives the same certificates
+    :param first_team:  <int> team number of the first certificate
+    :param outlined:    <bool> see synthetic_certificate()
+    :return:            <dict> {<str> filename (without path): <dict> info of the team}
+    """
+    rng = random.Random(seed)
+    truths = {}
+    for team_number in range(first_team, first_team + count):
+        filename = "%d.pdf" % team_number
+        truths[filename] = synthetic_truth(rng)
+        synthetic_certificate(truths[filename], os.path.join(out_path, filename), outlined)
+    with open(os.path.join(out_path, "truth.json"), "w") as f:
+        json.dump(truths, f, indent=4)
+    return truths
+
+
+def benchmark_synthetic(parser, truths):
+    """
+    translate synthetic certificates by parser.translate_pdf(), against their truths:
+    latency per certificate, throughput and field-level accuracy
+    :param parser:      <PrizeParser> whose files_path holds the certificates, use_text_layer=False to benchmark OCR
+    :param truths:      <dict> as returned by generate_certificates()
+    :return:            <str> report
+    """
+    lat, failed = [], []
+    correct = dict.fromkeys(FIELDS, 0)
+    wrong = []  # (filename, field, expected, got)
+    start_all = time.time()
+    for file, truth in tqdm(truths.items()):
+        start = time.time()
+        try:
+            info = parser.translate_pdf(filename=file)
+        except Exception as err:
+            failed.append((file, str(err)))
+            continue
+        finally:
+            lat.append(time.time() - start)
+        for field in FIELDS:
+            if info[field] == truth[field]:
+                correct[field] += 1
+            else:
+                wrong.append((file, field, truth[field], info[field]))
+    wall = time.time() - start_all
+
+    out_str = "\n=== [SYNTHETIC CERTIFICATES] ===\n" \
+              "\t%d PDF(s), %d failed\n" \
+              "[LATENCY]\t\t%s\n" \
+              "[THROUGHPUT]\t%.2f PDF(s)/s\n" \
+              "[ACCURACY]\t\t(of %d)\n" \
+              % (len(truths), len(failed), latency_str(lat), len(truths) / wall if wall else 0., len(truths))
+    for field in FIELDS:
+        out_str += "\t%-12s\t%.2f%%\n" % (field, correct[field] / len(truths) * 100. if truths else 0.)
+    out_str += "\t%-12s\t%.2f%%\n" % ("all", (len(truths) - len(failed) - len({_w[0] for _w in wrong}))
+                                      / len(truths) * 100. if truths else 0.)
+    if failed:
+        out_str += "[FAILED]\n%s" % "".join("\t%s\t%s\n" % _f for _f in failed)
+    if wrong:
+        out_str += "[WRONG]\n%s" % "".join("\t%s\t%-12s\t%r => %r\n" % _w for _w in wrong[:50])
+    print(out_str)
+    return out_str
+
+
+def benchmark_text_layer(parser, fl_lst):
+    """
+    compare the text layer path with the printing & OCR path on local PDFs
+    :param parser:      <PrizeParser>
+    :param fl_lst:      <list> of <str>, filename (without path) of local PDFs
+    :return:            <str> report
+    """
+    text_lat, ocr_lat = [], []
+    no_text_layer, ocr_failed = [], []
+    agreed = dict.fromkeys(FIELDS, 0)
+    compared = 0
+    for file in tqdm(fl_lst):
+        team_number = int(file.split(".")[0])
+
+        start = time.time()
+        text_info = parser.translate_text_layer(filename=file, team_number=team_number)
+        text_lat.append(time.time() - start)
+        if text_info is None:
+            no_text_layer.append(file)
+
+        start = time.time()
+        try:
+            page_img = parser.pdf_to_image(pdf_name=file)
+            ocr_info = parser.ocr_cropped_imgs(page_img, parser.crop_img(page_img), team_number)
+        except Exception:
+            ocr_info = None
+            ocr_failed.append(file)
+        ocr_lat.append(time.time() - start)
+
+        if text_info is None or ocr_info is None:
+            continue
+        compared += 1
+        for field in FIELDS:
+            agreed[field] += int(text_info[field] == ocr_info[field])
+
+    out_str = "\n=== [TEXT LAYER vs. OCR] ===\n" \
+              "\t%d PDF(s), %d without usable text layer, %d failed in OCR\n" \
+              "[TEXT LAYER]\t%s\n" \
+              "[OCR]\t\t\t%s\n" \
+              "[SPEEDUP]\t\t%.1fx\n" \
+              "[AGREEMENT]\t\t(of %d compared)\n" \
+              % (len(fl_lst), len(no_text_layer), len(ocr_failed),
+                 latency_str(text_lat), latency_str(ocr_lat),
+                 sum(ocr_lat) / sum(text_lat) if sum(text_lat) else 0., compared)
+    for field in FIELDS:
+        out_str += "\t%-12s\t%.2f%%\n" % (field, agreed[field] / compared * 100. if compared else 0.)
+    if no_text_layer:
+        out_str += "[NO TEXT LAYER]\n\t%s\n" % no_text_layer
+    print(out_str)
+    return out_str
+
+
+def benchmark_ocr_backends(parser, fl_lst, backends=("pytesseract", "tesserocr")):
+    """
+    compare OCR backends on the cropped images of local PDFs (printed and cropped once, OCRed by each backend)
+    :param parser:      <PrizeParser>
+    :param fl_lst:      <list> of <str>, filename (without path) of local PDFs
+    :param backends:    <tuple> of <str> backends, the first one is the reference of agreement
+    :return:            <str> report
+    """
+    engines = [create_ocr_engine(backend, parser.logger, parser.tessdata_path) for backend in backends]
+    original_engine = parser.ocr_engine
+    lat = [[] for _ in engines]
+    agreed = [dict.fromkeys(FIELDS, 0) for _ in engines]
+    compared = 0
+    for file in tqdm(fl_lst):
+        page_img = parser.pdf_to_image(pdf_name=file)
+        cropped_imgs = parser.crop_img(page_img)
+
+        infos = []
+        for idx, engine in enumerate(engines):
+            parser.ocr_engine = engine
+            start = time.time()
+            try:
+                infos.append(parser.parse_cache_2_get_result_info(cropped_imgs))
+            except Exception:
+                infos.append(None)
+            lat[idx].append(time.time() - start)
+        if not parser.cache_img_stream:
+            parser.remove_used_cache(list(cropped_imgs.values()) + [page_img])
+        if any(info is None for info in infos):
+            continue
+        compared += 1
+        for idx, info in enumerate(infos):
+            for field in FIELDS:
+                agreed[idx][field] += int(info[field] == infos[0][field])
+    parser.ocr_engine = original_engine
+
+    out_str = "\n=== [OCR BACKENDS] ===\n" \
+              "\t%d PDF(s), %d compared (with %s as reference)\n" % (len(fl_lst), compared, engines[0].name)
+    for idx, engine in enumerate(engines):
+        out_str += "[%s]\n\t%s\n\tagreement\t%s\n" \
+                   % (engine.name, latency_str(lat[idx]),
+                      "  ".join("%s %.2f%%" % (field, agreed[idx][field] / compared * 100. if compared else 0.)
+                                for field in FIELDS))
+    print(out_str)
+    return out_str
+
+
+def benchmark_render(parser, fl_lst, locate_zoom=2):
+    """
+    compare printing the whole page (then cropping) with region-aware printing on local PDFs
+    :param parser:      <PrizeParser> with cache_img_stream=True
+    :param fl_lst:      <list> of <str>, filename (without path) of local PDFs
+    :param locate_zoom: <float> zoom of the low-resolution page of region-aware printing
+    :return:            <str> report
+    """
+    original_zoom = parser.locate_zoom
+    parser.locate_zoom = locate_zoom
+    parser.locate_templates = parser.initiate_locate_templates()
+
+    page_lat, region_lat = [], []
+    page_bytes, region_bytes = [], []  # printed pixels in bytes
+    failed = []
+    agreed = dict.fromkeys(FIELDS, 0)
+    compared = 0
+    for file in tqdm(fl_lst):
+        try:
+            start = time.time()
+            page_img = parser.pdf_to_image(pdf_name=file)
+            page_imgs = parser.crop_img(page_img)
+            page_lat.append(time.time() - start)
+            page_shape = parser.load_page_img(page_img).shape
+            page_bytes.append(page_img.nbytes if isinstance(page_img, np.ndarray)  # printed in GrayScale
+                              else page_shape[0] * page_shape[1] * 3)  # printed in RGB
+
+            start = time.time()
+            region_imgs = parser.pdf_to_cropped_imgs(pdf_name=file)
+            region_lat.append(time.time() - start)
+            locate_pixels = page_shape[0] * page_shape[1] * (locate_zoom / parser.render_zoom) ** 2
+            region_bytes.append(int(locate_pixels) + sum(_img.nbytes for _img in region_imgs.values()
+                                                         if _img is not None))  # printed in GrayScale
+
+            page_info = parser.parse_cache_2_get_result_info(page_imgs)
+            region_info = parser.parse_cache_2_get_result_info(region_imgs)
+        except Exception:
+            failed.append(file)
+            continue
+        compared += 1
+        for field in FIELDS:
+            agreed[field] += int(page_info[field] == region_info[field])
+
+    parser.locate_zoom = original_zoom
+    parser.locate_templates = parser.initiate_locate_templates()
+
+    out_str = "\n=== [WHOLE PAGE vs. REGION-AWARE PRINTING] ===\n" \
+              "\t%d PDF(s), %d failed, render zoom %s, locate zoom %s\n" \
+              "[WHOLE PAGE]\t%s\n\t\t\t\tmean %.2fMB printed\n" \
+              "[REGION-AWARE]\t%s\n\t\t\t\tmean %.2fMB printed\n" \
+              "[SPEEDUP]\t\t%.1fx\n" \
+              "[AGREEMENT]\t\t(of %d compared)\n" \
+              % (len(fl_lst), len(failed), parser.render_zoom, locate_zoom,
+                 latency_str(page_lat), np.mean(page_bytes) / 2 ** 20 if page_bytes else 0.,
+                 latency_str(region_lat), np.mean(region_bytes) / 2 ** 20 if region_bytes else 0.,
+                 sum(page_lat) / sum(region_lat) if sum(region_lat) else 0., compared)
+    for field in FIELDS:
+        out_str += "\t%-12s\t%.2f%%\n" % (field, agreed[field] / compared * 100. if compared else 0.)
+    if failed:
+        out_str += "[FAILED]\n\t%s\n" % failed
+    print(out_str)
+    return out_str
+
+
+def benchmark_locate(parser, fl_lst):
+    """
+    regression of coarse-to-fine locating against the full-page search on local PDFs,
+    the best fit locations (max_fits) of all the templates are expected to be the same
+    :param parser:      <PrizeParser> with cache_img_stream=True
+    :param fl_lst:      <list> of <str>, filename (without path) of local PDFs
+    :return:            <str> report
+    """
+    full_lat, c2f_lat = [], []
+    mismatched = []  # (filename, full-page max_fits, coarse-to-fine max_fits)
+    for file in tqdm(fl_lst):
+        page_img = parser.pdf_to_image(pdf_name=file)
+        img = parser.load_page_img(page_img)
+
+        start = time.time()
+        full_fits = parser.locate_full(img)
+        full_lat.append(time.time() - start)
+
+        start = time.time()
+        c2f_fits = parser.locate_coarse_to_fine(img)
+        c2f_lat.append(time.time() - start)
+
+        if [tuple(_fit) for _fit in full_fits] != [tuple(_fit) for _fit in c2f_fits]:
+            mismatched.append((file, full_fits, c2f_fits))
+
+    out_str = "\n=== [FULL PAGE vs. COARSE-TO-FINE LOCATING] ===\n" \
+              "\t%d PDF(s), %d mismatched\n" \
+              "[FULL PAGE]\t\t%s\n" \
+              "[COARSE-TO-FINE]\t%s\n" \
+              "[SPEEDUP]\t\t%.1fx\n" \
+              % (len(fl_lst), len(mismatched), latency_str(full_lat), latency_str(c2f_lat),
+                 sum(full_lat) / sum(c2f_lat) if sum(c2f_lat) else 0.)
+    if mismatched:
+        out_str += "[MISMATCHED]\n%s" % "".join("\t%s\t%s => %s\n" % _m for _m in mismatched)
+    print(out_str)
+    return out_str
+
+
+if __name__ == "__main__":
+    PATH = r"...\202004 MCM_ICM Results\MCM_ICM"
+
+    # # Text Layer vs. OCR, on Local PDFs
+    # Logger = create_logger(os.path.join(PATH, "log_benchmark"), less_log=True)
+    # pt = PrizeParser(PATH, files_path="2020 MCM_ICM 获奖证书-20200428/", logger=Logger,
+    #                  report_filename="report_benchmark", result_filename="result_benchmark.json")
+    # benchmark_text_layer(pt, pt.get_files_names()[:100])
+
+    # # OCR Backends, on Local PDFs
+    # Logger = create_logger(os.path.join(PATH, "log_benchmark"), less_log=True)
+    # pt = PrizeParser(PATH, files_path="2020 MCM_ICM 获奖证书-20200428/", logger=Logger,
+    #                  report_filename="report_benchmark", result_filename="result_benchmark.json")
+    # benchmark_ocr_backends(pt, pt.get_files_names()[:100])
+
+    # # Whole Page vs. Region-Aware Printing, on Local PDFs
+    # Logger = create_logger(os.path.join(PATH, "log_benchmark"), less_log=True)
+    # pt = PrizeParser(PATH, files_path="2020 MCM_ICM 获奖证书-20200428/", logger=Logger,
+    #                  report_filename="report_benchmark", result_filename="result_benchmark.json")
+    # benchmark_render(pt, pt.get_files_names()[:100], locate_zoom=2)
+
+    # # Full Page vs. Coarse-to-Fine Locating (Regression), on Local PDFs
+    # Logger = create_logger(os.path.join(PATH, "log_benchmark"), less_log=True)
+    # pt = PrizeParser(PATH, files_path="2020 MCM_ICM 获奖证书-20200428/", logger=Logger,
+    #                  report_filename="report_benchmark", result_filename="result_benchmark.json")
+    # benchmark_locate(pt, pt.get_files_names())
+
+    # # Synthetic Certificates (Offline), Latency & Accuracy
+    # Logger = create_logger(os.path.join(PATH, "log_benchmark"), less_log=True)
+    # pt = PrizeParser(PATH, files_path="synthetic/", logger=Logger, use_text_layer=False,
+    #                  report_filename="report_benchmark", result_filename="result_benchmark.json")
+    # os.makedirs(pt.files_path, exist_ok=True)
+    # benchmark_synthetic(pt, generate_certificates(pt.files_path, count=100, seed=0))
+
+    print("Welcome to MCM/ICM Parser Benchmark. Please edit annotations to start executions.")
@@ -2,12 +2,17 @@ import os
 import sys
 import shutil
 from tqdm import tqdm
-import urllib.request
 import urllib.error
 import socket
+import sqlite3
 from datetime import datetime
 import numpy as np
 import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from Discoverer import is_not_found, discover_teams, load_seed_teams, save_teams, load_teams
+from Store import PackStore
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))  # shared modules at repository root
+from Requester import Requester
 
 OUTPUT_DES_ROOT = r"...\202004 MCM_ICM Results\MCM_ICM"
 TIME_STAMP = datetime.now().strftime("%Y%m%d")  # e.g. 20200422
@@ -15,8 +20,58 @@ OUTPUT_DES_FOLDER = "2020 MCM_ICM 获奖证书-" + TIME_STAMP  # e.g. 2020 MCM_I
 LOG_FILE = "0 log.txt"
 DEBUG_MODE = True
 MAX_ATTEMPTS = 1
+TIMEOUT = 5  # seconds
+WORKERS = 16  # number of concurrent download threads, 1 for the plain serial crawl
 MIN = 2000000
 MAX = 2099999
+URL_PATTERN = "http://comap-math.com/mcm/2020Certs/%d.pdf"
+DISCOVERY = False  # whether to discover existing teams (HEAD requests only) before downloading
+DISCOVERY_SEED = None  # (relative to OUTPUT_DES_ROOT) results JSON to seed the discovery, None if not used
+DISCOVERY_SEED_OFFSET = 100000  # added to the seeded team numbers, e.g. 2019 => 2020
+DISCOVERY_FILE = "0 discovered teams.json"
+RESUME = False  # whether to resume the crawl in OUTPUT_DES_FOLDER instead of starting over
+CHECKPOINT_FILE = "0 checkpoint.db"
+CHECKPOINT_INTERVAL = 500  # number of teams between two commits of the checkpoint
+PACK_STORE = None  # (relative to OUTPUT_DES_ROOT) pack store to keep the PDFs in, shared with the online parser
+#                    (e.g. "0 pdfs", for "0 pdfs.pack" & "0 pdfs.idx"), None for one "%d.pdf" file per team
+
+REQUESTER = Requester(timeout=TIMEOUT, pool_size=WORKERS)  # keep-alive connections shared by the threads
+PACK = PackStore(os.path.join(OUTPUT_DES_ROOT, PACK_STORE)) if PACK_STORE else None
+
+# download status of a team
+DOWNLOADED, NON_EXIST, TIMED_OUT = 0, 1, 2
+
+
+class Checkpoint(object):
+    """
+    records the status of each probed team in a SQLite table, so that a crawl can be resumed
+    """
+    def __init__(self, filename=CHECKPOINT_FILE, interval=CHECKPOINT_INTERVAL):
+        self.conn = sqlite3.connect(filename)
+        self.conn.execute("CREATE TABLE IF NOT EXISTS teams (team_id INTEGER PRIMARY KEY, status INTEGER)")
+        self.conn.commit()
+        self.interval = interval
+        self._uncommitted = 0
+
+    def statuses(self):
+        """
+        :return:    <dict> {<int> team number: <int> status}
+        """
+        return dict(self.conn.execute("SELECT team_id, status FROM teams"))
+
+    def record(self, team_id, status):
+        self.conn.execute("INSERT OR REPLACE INTO teams VALUES (?, ?)", (team_id, status))
+        self._uncommitted += 1
+        if self._uncommitted >= self.interval:
+            self.commit()
+
+    def commit(self):
+        self.conn.commit()
+        self._uncommitted = 0
+
+    def close(self):
+        self.commit()
+        self.conn.close()
 
 
 class Logger(object):
@@ -35,8 +90,73 @@ class Logger(object):
         self.log.flush()
 
 
+def download_team(team_id):
+    """
+    request the certificate of a team and save it as "%d.pdf" (or add it to PACK)
+    :param team_id:     <int> team number
+    :return:            <int> DOWNLOADED, NON_EXIST (404) or TIMED_OUT (timed out or failed otherwise, e.g. 429, 5xx)
+                        None if an empty file is responded
+    """
+    url = URL_PATTERN % team_id
+
+    content = None
+    attempts = 0
+    while attempts <= MAX_ATTEMPTS:
+        try:
+            content = REQUESTER.get(url, timeout=TIMEOUT)
+            break
+        except (socket.timeout, urllib.error.URLError) as err:  # HTTPError included
+            if is_not_found(err):
+                if DEBUG_MODE:
+                    print("[ERROR] %d: %s" % (team_id, err))
+                return NON_EXIST
+            attempts += 1
+            if attempts > MAX_ATTEMPTS:
+                if DEBUG_MODE:
+                    print("[ERROR] %d: %s" % (team_id, err))
+                return TIMED_OUT
+            continue
+
+    if not content:
+        return None
+
+    if PACK is not None:
+        PACK.put(team_id, content)
+    else:
+        # written as a partial file first, so that an interrupted write is never taken as downloaded
+        with open("%d.pdf.part" % team_id, "wb") as f:
+            f.write(content)
+        os.replace("%d.pdf.part" % team_id, "%d.pdf" % team_id)
+    if DEBUG_MODE:
+        print("%d Downloaded" % team_id)
+    return DOWNLOADED
+
+
+def crawl_concurrently(team_ids, workers):
+    """
+    download certificates with a pool of threads, at most 4 * workers requests are queued at a time
+    :param team_ids:    <iterable> of <int> team numbers
+    :param workers:     <int> number of threads
+    :return:            <generator> of (<int> team number, <int> status), in the order of completion
+    """
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        pending = {}
+        for _team_id in team_ids:
+            pending[executor.submit(download_team, _team_id)] = _team_id
+            if len(pending) < 4 * workers:
+                continue
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                yield pending.pop(future), future.result()
+        for future in list(pending):
+            yield pending.pop(future), future.result()
+
+
 os.chdir(OUTPUT_DES_ROOT)
-if os.path.exists(OUTPUT_DES_FOLDER):
+if RESUME and os.path.exists(OUTPUT_DES_FOLDER):
+    if DEBUG_MODE:
+        print("\tPrevious Destination Folder Resumed")
+elif os.path.exists(OUTPUT_DES_FOLDER):
     while 1:
         try:
             shutil.rmtree(OUTPUT_DES_FOLDER)
@@ -46,7 +166,7 @@ if os.path.exists(OUTPUT_DES_FOLDER):
             break
         except:
             time.sleep(0.5)
-while 1:
+while not os.path.exists(OUTPUT_DES_FOLDER):
     try:
         os.mkdir(OUTPUT_DES_FOLDER)
         time.sleep(0.1)
@@ -65,40 +185,57 @@ start = datetime.now()
 downloaded_teams = []
 non_exist_teams = []
 timed_out_teams = []
-for team_id in tqdm(range(MIN, MAX + 1)):
-    url = "http://comap-math.com/mcm/2020Certs/%d.pdf" % team_id
-
-    response, content = None, None
-    attempts = 0
-    while attempts <= MAX_ATTEMPTS:
-        try:
-            response = urllib.request.urlopen(url, timeout=5)
-            content = response.read()
-            break
-        except (urllib.error.HTTPError, urllib.error.URLError) as err:
-            if DEBUG_MODE:
-                print("[ERROR] %d: %s" % (team_id, err))
-            non_exist_teams.append(team_id)
-            break
-        except socket.timeout as err:
-            attempts += 1
-            if 5 == attempts:
-                timed_out_teams.append(team_id)
-                if DEBUG_MODE:
-                    print("[ERROR] %d: %s" % (team_id, err))
-            continue
+status_lists = {DOWNLOADED: downloaded_teams, NON_EXIST: non_exist_teams, TIMED_OUT: timed_out_teams}
+if DISCOVERY and RESUME and os.path.exists(DISCOVERY_FILE):
+    to_crawl = load_teams(DISCOVERY_FILE)
+elif DISCOVERY:
+    seed = load_seed_teams(os.path.join(OUTPUT_DES_ROOT, DISCOVERY_SEED), DISCOVERY_SEED_OFFSET) \
+        if DISCOVERY_SEED else None
+    to_crawl = discover_teams(MIN, MAX, URL_PATTERN, seed_teams=seed, workers=max(WORKERS, 1),
+                              timeout=TIMEOUT, max_attempts=MAX_ATTEMPTS, requester=REQUESTER)
+    save_teams(to_crawl, DISCOVERY_FILE)
+    print("[Discovered]\t%d Teams" % len(to_crawl))
+else:
+    to_crawl = range(MIN, MAX + 1)
 
-    if not content:
-        continue
+# skip the teams finished in previous runs, only time-outs and un-probed teams are to crawl
+checkpoint = Checkpoint()
+if RESUME:
+    finished = {_id: _status for _id, _status in checkpoint.statuses().items() if TIMED_OUT != _status}
+    for _file in os.listdir("."):
+        if _file.endswith(".pdf") and _file[:-4].isdigit():
+            finished[int(_file[:-4])] = DOWNLOADED
+    if PACK is not None:
+        finished.update((_id, DOWNLOADED) for _id in PACK.keys())
+    for team_id in to_crawl:
+        if team_id in finished:
+            status_lists[finished[team_id]].append(team_id)
+    print("[Resumed]\t%d Teams Finished Previously" % sum(len(_lst) for _lst in status_lists.values()))
+    to_resume = [_id for _id in to_crawl if _id not in finished]
+else:
+    to_resume = to_crawl
 
-    open("%d.pdf" % team_id, "wb").write(content)
-    downloaded_teams.append(team_id)
-    if DEBUG_MODE:
-        print("%d Downloaded" % team_id)
+if WORKERS > 1:
+    with tqdm(total=len(to_resume)) as pbar:
+        for team_id, status in crawl_concurrently(to_resume, WORKERS):
+            if status is not None:
+                status_lists[status].append(team_id)
+                checkpoint.record(team_id, status)
+            pbar.update()
+else:
+    for team_id in tqdm(to_resume):
+        status = download_team(team_id)
+        if status is not None:
+            status_lists[status].append(team_id)
+            checkpoint.record(team_id, status)
+checkpoint.close()
+# keep the lists sorted as in the serial crawl
+for _lst in status_lists.values():
+    _lst.sort()
 
 print("\n\n========================================")
 print("================ REPORT ================\n")
-total_team_cnt = MAX - MIN
+total_team_cnt = len(to_crawl)
 downloaded_team_cnt = len(downloaded_teams)
 non_exist_team_cnt = len(non_exist_teams)
 timed_out_team_cnt = len(timed_out_teams)
@@ -124,6 +261,9 @@ if timed_out_team_cnt:
     print("[Timed Out]\n\t", np.array(timed_out_teams), "\n")
 else:
     print("[Timed Out]\t\tNone\n")
+if PACK is not None:
+    print("[Pack Store]\n%s" % PACK.report())
+    PACK.close()
 # print()
 
 print("========================================")
@@ -0,0 +1,124 @@
+import os
+import sys
+import json
+import socket
+import urllib.error
+from concurrent.futures import ThreadPoolExecutor
+from tqdm import tqdm
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))  # shared modules at repository root
+from Requester import Requester
+
+
+def is_not_found(err):
+    """
+    :param err:     <Exception> raised by Requester
+    :return:        <bool> True if the certificate does not exist (404),
+                    False for transient failures (e.g. 429, 5xx, connection failures) to be retried or reported
+    """
+    return isinstance(err, urllib.error.HTTPError) and 404 == err.code
+
+
+def team_exists(url, timeout=5, max_attempts=1, requester=None):
+    """
+    probe a certificate with a HEAD request, so that no PDF body is transferred
+    :param url:             <str> url of the certificate
+    :param timeout:         <float> timeout in seconds
+    :param max_attempts:    <int> max re-attempts after time-outs and transient failures (e.g. 429, 5xx)
+    :param requester:       <Requester> shared HTTP client, None to create one
+    :return:                <bool> True if exists, False if 404
+                            None if timed out or failed otherwise (existence unknown)
+    """
+    requester = requester if requester is not None else Requester(timeout=timeout)
+    attempts = 0
+    while attempts <= max_attempts:
+        try:
+            requester.head(url, timeout=timeout)
+            return True
+        except (socket.timeout, urllib.error.URLError) as err:  # HTTPError included
+            if is_not_found(err):
+                return False
+            attempts += 1
+    return None
+
+
+def load_seed_teams(json_path, offset=0):
+    """
+    load team numbers from a results JSON of the Parser (e.g. of the previous year)
+    :param json_path:   <str> path of the results JSON, with key "teams numbers"
+    :param offset:      <int> added to each team number, e.g. 100000 to seed 2020 with 2019 (19***** => 20*****)
+    :return:            <list> of <int> team numbers
+    """
+    with open(json_path, "r") as f:
+        res = json.load(f)
+    return [_team + offset for _team in res["teams numbers"]]
+
+
+def discover_teams(lo, hi, url_pattern, seed_teams=None, workers=32, block_size=1000, sample_stride=25,
+                   timeout=5, max_attempts=1, requester=None):
+    """
+    discover the existing team numbers in [lo, hi] without downloading any PDF
+        1. the range is split into blocks of "block_size" team numbers
+        2. blocks containing seeded team numbers are dense, others are sampled every "sample_stride" numbers
+        3. a sampled block with any hit turns dense, and every number of dense blocks are probed
+    Blocks without any sampled hits are regarded as empty, use sample_stride=1 for an exhaustive sweep.
+    :param lo:              <int> lower bound (include itself) of the team numbers
+    :param hi:              <int> upper bound (include itself) of the team numbers
+    :param url_pattern:     <str> url of a certificate, formatted with the team number
+    :param seed_teams:      <iterable> of <int> team numbers known (or likely) to exist
+                            None (default)
+    :param workers:         <int> number of concurrent probing threads
+    :param block_size:      <int> size of the blocks
+    :param sample_stride:   <int> sampling stride in the blocks
+    :param timeout:         <float> timeout in seconds of each probe
+    :param max_attempts:    <int> max re-attempts after time-outs of each probe
+    :param requester:       <Requester> shared HTTP client, None to create one
+    :return:                <list> of <int> sorted existing team numbers,
+                            (including timed out ones, whose existence is unknown)
+    """
+    requester = requester if requester is not None else Requester(timeout=timeout, pool_size=workers)
+
+    def _probe(team_ids, desc):
+        _res = {}
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            _probed = executor.map(lambda _id: team_exists(url_pattern % _id, timeout, max_attempts, requester),
+                                   team_ids)
+            for _id, _exists in zip(team_ids, tqdm(_probed, total=len(team_ids), desc=desc)):
+                _res[_id] = _exists
+        return _res
+
+    blocks = list(range(lo, hi + 1, block_size))
+    dense = set()
+    if seed_teams is not None:
+        dense.update(lo + (_team - lo) // block_size * block_size for _team in seed_teams if lo <= _team <= hi)
+
+    # sample the un-seeded blocks
+    samples = [_id for _block in blocks if _block not in dense
+               for _id in range(_block, min(_block + block_size, hi + 1), sample_stride)]
+    probed = _probe(samples, "Sampling")
+    dense.update(lo + (_id - lo) // block_size * block_size for _id, _exists in probed.items() if _exists is not False)
+
+    # sweep the dense blocks
+    sweep = [_id for _block in sorted(dense)
+             for _id in range(_block, min(_block + block_size, hi + 1)) if _id not in probed]
+    probed.update(_probe(sweep, "Sweeping"))
+
+    return sorted(_id for _id, _exists in probed.items() if _exists is not False)
+
+
+def save_teams(teams, json_path):
+    """
+    :param teams:       <list> of <int> team numbers
+    :param json_path:   <str> path of the output JSON
+    """
+    with open(json_path, "w") as f:
+        json.dump(obj={"fields": ["teams counts", "teams numbers"],
+                       "teams counts": len(teams),
+                       "teams numbers": teams}, fp=f, indent=4)
+
+
+def load_teams(json_path):
+    """
+    :param json_path:   <str> path of a JSON saved by save_teams() or a results JSON of the Parser
+    :return:            <list> of <int> team numbers
+    """
+    return load_seed_teams(json_path)
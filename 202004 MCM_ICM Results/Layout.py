@@ -0,0 +1,121 @@
+import threading
+import cv2
+
+# indices of the templates, see PrizeParser.templates_names
+ANCHORS = (0, 1, 3)  # centered fixed sentences, whose locations identify a layout
+_OF = 2  # "Of" moves horizontally with the (centered) school name, only its row is kept by a layout
+
+
+class LayoutCache(object):
+    """
+    best fit locations (max_fits) of the templates of the recently seen layouts, most recent first
+    a page is of a cached layout if all the anchors are found in small windows around their cached locations,
+    then "Of" is located along its cached row (on the whole page if the fit there scores below the threshold),
+    so that the full search is skipped and the locations are those of the full search
+    """
+
+    def __init__(self, templates, capacity=8, margin=20, threshold=0.8):
+        """
+        :param templates:   <list> of templates at the zoom of the pages
+        :param capacity:    <int> max layouts kept
+        :param margin:      <int> pixels the anchors may move from the cached locations
+        :param threshold:   <float> min TM_CCOEFF_NORMED score of each anchor to verify a layout
+        """
+        self.templates = templates
+        self.capacity = capacity
+        self.margin = margin
+        self.threshold = threshold
+        self.layouts = []  # <list> of max_fits
+        self.hits, self.misses = 0, 0
+        self._popped = (0, 0)  # hits and misses at the last pop, see self.pop_counts()
+        self._lock = threading.Lock()
+
+    def _window(self, img, loc, shape, full_row=False):
+        """
+        :return:    <tuple> (<numpy.ndarray> window of "img" around "loc", x offset, y offset)
+        """
+        x0, y0 = max(0, loc[0] - self.margin), max(0, loc[1] - self.margin)
+        x1, y1 = min(img.shape[1], loc[0] + shape[1] + self.margin), min(img.shape[0], loc[1] + shape[0] + self.margin)
+        if full_row:
+            x0, x1 = 0, img.shape[1]
+        return img[y0:y1, x0:x1], x0, y0
+
+    def _verify(self, img, max_fits):
+        """
+        :return:    <list> best fit locations of the templates on "img", None if not of the layout
+        """
+        located = [None] * len(self.templates)
+        for idx in ANCHORS:
+            template = self.templates[idx]
+            window, x0, y0 = self._window(img, max_fits[idx], template.shape)
+            if window.shape[0] < template.shape[0] or window.shape[1] < template.shape[1]:
+                return None
+            if cv2.minMaxLoc(cv2.matchTemplate(window, template, cv2.TM_CCOEFF_NORMED))[1] < self.threshold:
+                return None
+            max_loc = cv2.minMaxLoc(cv2.matchTemplate(window, template, cv2.TM_CCOEFF))[3]  # as the full search
+            located[idx] = (max_loc[0] + x0, max_loc[1] + y0)
+
+        template = self.templates[_OF]
+        window, x0, y0 = self._window(img, max_fits[_OF], template.shape, full_row=True)
+        max_loc = cv2.minMaxLoc(cv2.matchTemplate(window, template, cv2.TM_CCOEFF))[3]
+        x, y = max_loc[0] + x0, max_loc[1] + y0
+        fit = img[y:y + template.shape[0], x:x + template.shape[1]]
+        if cv2.matchTemplate(fit, template, cv2.TM_CCOEFF_NORMED)[0, 0] < self.threshold:  # not along its row
+            x, y = cv2.minMaxLoc(cv2.matchTemplate(img, template, cv2.TM_CCOEFF))[3]
+        located[_OF] = (x, y)
+        return located
+
+    def lookup(self, img):
+        """
+        :param img:     <numpy.ndarray> GrayScale page
+        :return:        <list> best fit locations x * y of the templates if "img" is of a cached layout
+                        None otherwise (a miss, to be searched and added)
+        """
+        with self._lock:
+            layouts = list(self.layouts)
+        for max_fits in layouts:
+            located = self._verify(img, max_fits)
+            if located is None:
+                continue
+            with self._lock:
+                self.hits += 1
+                if max_fits in self.layouts:  # move to the front
+                    self.layouts.remove(max_fits)
+                    self.layouts.insert(0, max_fits)
+            return located
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def add(self, max_fits):
+        """
+        :param max_fits:    <list> best fit locations x * y of the templates of a newly seen layout
+        """
+        with self._lock:
+            self.layouts.insert(0, [tuple(_fit) for _fit in max_fits])
+            del self.layouts[self.capacity:]
+
+    def pop_counts(self):
+        """
+        :return:    <tuple> (hits, misses) since the last pop, to be merged into the cache of another process
+        """
+        with self._lock:
+            counts = (self.hits - self._popped[0], self.misses - self._popped[1])
+            self._popped = (self.hits, self.misses)
+        return counts
+
+    def merge_counts(self, counts):
+        """
+        :param counts:  <tuple> (hits, misses), as returned by self.pop_counts() (e.g. of a worker process)
+        """
+        with self._lock:
+            self.hits += counts[0]
+            self.misses += counts[1]
+
+    def report(self):
+        """
+        :return:    <str> hit rate of the cache, including the counts merged (the layouts of other processes are not)
+        """
+        lookups = self.hits + self.misses
+        return "\t%d hits, %d misses (%.2f%% hit rate)\n" \
+               % (self.hits, self.misses, self.hits / lookups * 100. if lookups else 0.)
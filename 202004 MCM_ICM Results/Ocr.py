@@ -0,0 +1,209 @@
+import time
+import hashlib
+import sqlite3
+import threading
+import numpy as np
+import pytesseract
+from PIL import Image
+
+try:  # optional, for the persistent engine
+    import tesserocr
+except ImportError:
+    tesserocr = None
+
+# keys of the word boxes returned by image_to_data(), as pytesseract.Output.DICT
+DATA_KEYS = ["level", "page_num", "block_num", "par_num", "line_num", "word_num",
+             "left", "top", "width", "height", "conf", "text"]
+
+
+class PytesseractEngine(object):
+    """
+    OCR by pytesseract, which runs the "tesseract" binary in a new process for every call
+    """
+    name = "pytesseract"
+
+    @staticmethod
+    def image_to_string(img):
+        """
+        :param img:     <PIL.Image> or <numpy.ndarray> image to OCR
+        :return:        <str> OCRed text
+        """
+        return pytesseract.image_to_string(img)
+
+    @staticmethod
+    def image_to_data(img):
+        """
+        :param img:     <PIL.Image> or <numpy.ndarray> image to OCR
+        :return:        <dict> {key: <list>} of word boxes, see DATA_KEYS
+        """
+        return pytesseract.image_to_data(img, output_type=pytesseract.Output.DICT)
+
+
+class TesserocrEngine(object):
+    """
+    OCR by tesserocr, an in-process API of tesseract:
+        an API handle is kept alive per thread, so that the trained data is loaded only once
+    """
+    name = "tesserocr"
+
+    def __init__(self, lang="eng", tessdata_path=None):
+        """
+        :param lang:            <str> language of the trained data
+        :param tessdata_path:   <str> path of the trained data, None for the default one of tesserocr
+        """
+        if tesserocr is None:
+            raise ImportError("tesserocr Not Installed")
+        self.lang = lang
+        self.tessdata_path = tessdata_path
+        self._local = threading.local()
+
+    def _api(self):
+        api = getattr(self._local, "api", None)
+        if api is None:
+            kwargs = {"lang": self.lang}
+            if self.tessdata_path:
+                kwargs["path"] = self.tessdata_path
+            api = tesserocr.PyTessBaseAPI(**kwargs)
+            self._local.api = api
+        return api
+
+    def _set_image(self, img):
+        api = self._api()
+        api.SetImage(Image.fromarray(img) if isinstance(img, np.ndarray) else img)
+        return api
+
+    def image_to_string(self, img):
+        return self._set_image(img).GetUTF8Text()
+
+    def image_to_data(self, img):
+        api = self._set_image(img)
+        data = {key: [] for key in DATA_KEYS}
+        for row in api.GetTSVText(0).splitlines():
+            values = row.split("\t")
+            if len(values) < len(DATA_KEYS):  # no text of non-word levels
+                values.append("")
+            for key, value in zip(DATA_KEYS, values):
+                if "text" == key:
+                    data[key].append(value)
+                else:
+                    data[key].append(float(value) if "conf" == key else int(value))
+        return data
+
+
+class CachedEngine(object):
+    """
+    OCR engine with a content-addressed cache of image_to_string() in a SQLite file:
+        keyed by the hash of the inked part of the image (so that the same text cropped at different offsets hits),
+        least recently used entries are evicted beyond "capacity",
+        shared across runs and worker processes (each thread owns a connection)
+    image_to_data() is not cached
+    """
+
+    def __init__(self, engine, filename, capacity=100000):
+        """
+        :param engine:      OCR engine to run on misses
+        :param filename:    <str> path of the SQLite file
+        :param capacity:    <int> max entries kept
+        """
+        self.engine = engine
+        self.name = engine.name
+        self.filename = filename
+        self.capacity = capacity
+        self.hits, self.misses = 0, 0
+        self._popped = (0, 0)  # hits and misses at the last pop, see self.pop_counts()
+        self._puts = 0
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._conn().execute("CREATE TABLE IF NOT EXISTS ocr (key TEXT PRIMARY KEY, text TEXT, used REAL)")
+
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.filename, timeout=30, isolation_level=None)  # auto-commit
+            conn.execute("PRAGMA journal_mode=WAL")  # readers are not blocked by the writer
+            self._local.conn = conn
+        return conn
+
+    def key(self, img):
+        """
+        :param img:     <PIL.Image> or <numpy.ndarray> GrayScale image
+        :return:        <str> hash of the inked part of "img", prefixed by the name of the engine
+        """
+        img = np.asarray(img.convert("L") if isinstance(img, Image.Image) else img)
+        ink = img < 128
+        rows, cols = np.flatnonzero(ink.any(axis=1)), np.flatnonzero(ink.any(axis=0))
+        if rows.size:
+            img = img[rows[0]:rows[-1] + 1, cols[0]:cols[-1] + 1]
+        digest = hashlib.sha1(("%d,%d," % img.shape[:2]).encode())
+        digest.update(np.ascontiguousarray(img).tobytes())
+        return "%s:%s" % (self.name, digest.hexdigest())
+
+    def image_to_string(self, img):
+        key = self.key(img)
+        conn = self._conn()
+        row = conn.execute("SELECT text FROM ocr WHERE key = ?", (key,)).fetchone()
+        if row is not None:
+            conn.execute("UPDATE ocr SET used = ? WHERE key = ?", (time.time(), key))
+            with self._lock:
+                self.hits += 1
+            return row[0]
+
+        text = self.engine.image_to_string(img)
+        conn.execute("INSERT OR REPLACE INTO ocr VALUES (?, ?, ?)", (key, text, time.time()))
+        with self._lock:
+            self.misses += 1
+            self._puts += 1
+            evict = 0 == self._puts % 100
+        if evict:  # check the size every 100 insertions
+            conn.execute("DELETE FROM ocr WHERE key IN (SELECT key FROM ocr ORDER BY used DESC LIMIT -1 OFFSET ?)",
+                         (self.capacity,))
+        return text
+
+    def image_to_data(self, img):
+        return self.engine.image_to_data(img)
+
+    def pop_counts(self):
+        """
+        :return:    <tuple> (hits, misses) since the last pop, to be merged into the cache of another process
+        """
+        with self._lock:
+            counts = (self.hits - self._popped[0], self.misses - self._popped[1])
+            self._popped = (self.hits, self.misses)
+        return counts
+
+    def merge_counts(self, counts):
+        """
+        :param counts:  <tuple> (hits, misses), as returned by self.pop_counts() (e.g. of a worker process)
+        """
+        with self._lock:
+            self.hits += counts[0]
+            self.misses += counts[1]
+
+    def report(self):
+        """
+        :return:    <str> hit rate of the cache, including the counts merged, and the texts in the SQLite file
+                    (shared with the other processes)
+        """
+        lookups = self.hits + self.misses
+        size = self._conn().execute("SELECT COUNT(*) FROM ocr").fetchone()[0]
+        return "\t%d hits, %d misses (%.2f%% hit rate), %d texts cached\n" \
+               % (self.hits, self.misses, self.hits / lookups * 100. if lookups else 0., size)
+
+
+def create_ocr_engine(backend="pytesseract", logger=None, tessdata_path=None):
+    """
+    :param backend:         <str> "pytesseract" or "tesserocr"
+    :param logger:          <logging.Logger> to warn if falling back to pytesseract
+    :param tessdata_path:   <str> path of the trained data of tesserocr, None for the default one
+    :return:                OCR engine, falls back to PytesseractEngine if tesserocr is not installed
+                            or fails to initiate (e.g. invalid trained data path)
+    """
+    if "tesserocr" == backend:
+        try:
+            engine = TesserocrEngine(tessdata_path=tessdata_path)
+            engine._api()  # initiated at once, so that a failure falls back here instead of failing every call
+            return engine
+        except (ImportError, RuntimeError) as err:
+            if logger is not None:
+                logger.warning("[WARNING] %s, Falling Back to pytesseract" % err)
+    return PytesseractEngine()
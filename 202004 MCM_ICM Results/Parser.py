@@ -1,21 +1,29 @@
 import os
+import sys
 import re
 import shutil
 import time
 from datetime import datetime
-import urllib.request
 import urllib.error
 import socket
 import copy
 import json
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 import logging
 from logging.handlers import RotatingFileHandler
 import cv2
 import fitz
-import pytesseract
 from PIL import Image
 from tqdm import tqdm
 import numpy as np
+from Pipeline import Stage, Pipeline
+from Ocr import create_ocr_engine, CachedEngine
+from Layout import LayoutCache
+from Store import ResultStore, PackStore
+from Profiler import StageProfiler
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))  # shared modules at repository root
+from Requester import Requester
 
 
 def create_logger(log_path="log.txt", less_log=False):
@@ -52,11 +60,36 @@ def create_logger(log_path="log.txt", less_log=False):
     return _logger
 
 
+class PixmapArray(np.ndarray):
+    """
+    <numpy.ndarray> on the samples of a <fitz.Pixmap>, which is kept alive by the array and the views of it
+    """
+    def __array_finalize__(self, obj):
+        self.pixmap = getattr(obj, "pixmap", None)
+
+
+def pixmap_to_array(pm):
+    """
+    :param pm:  <fitz.Pixmap> GrayScale, without alpha
+    :return:    <PixmapArray> y * x, on the samples of "pm" without copying (if supported by PyMuPDF)
+    """
+    samples = getattr(pm, "samples_mv", None)  # memoryview, for PyMuPDF of newer versions
+    samples = samples if samples is not None else pm.samples  # <bytes> copy otherwise
+    arr = np.frombuffer(samples, dtype=np.uint8).reshape(pm.height, pm.stride)[:, :pm.width].view(PixmapArray)
+    arr.pixmap = pm
+    return arr
+
+
 class PrizeParser:
     def __init__(self, root, files_path="files/", templates_path="templates/", logger=None,
                  delete_cache=True, cache_img_stream=True,
-                 report_filename="report", result_filename="result.json",
-                 _online_max_conti_err=1000, _online_timeout=5, _online_max_attempts=2):
+                 report_filename="report", result_filename="result.json", parallel_workers=0, use_text_layer=True,
+                 single_pass_ocr=False, ocr_backend="pytesseract", tessdata_path=None,
+                 zero_copy=True, render_zoom=5, locate_zoom=None,
+                 coarse_to_fine=False, layout_cache_size=8, ocr_cache_file=None, ocr_cache_size=100000,
+                 result_store_file=None, resume=False, checkpoint_interval=100, profile=False, metrics_filename=None,
+                 _online_max_conti_err=1000, _online_timeout=5, _online_max_attempts=2,
+                 _online_pipeline_workers=None, _online_pipeline_queue_size=4, _online_pack_store=None):
         """
         :param root: (Required)     <str>   Default workspace: where required files are stored, etc.
         :param files_path:          <str>   (relative to "root") local path where PDF(s) are/is stored
@@ -76,12 +109,72 @@ class PrizeParser:
                                             [DEFAULT] "report"
         :param result_filename:     <str>   (relative to "root") local path where result json file is stored
                                             [DEFAULT] "result.json"
+        :param parallel_workers:    <int>   number of processes to translate PDFs with, None for all the cores
+                                            [DEFAULT] 0 (translate in the main process)
+        :param use_text_layer:      <bool>  Whether to read the text layer of PDFs directly,
+                                            falling back to printing and OCR only if no usable text layer exists
+                                            [DEFAULT] True
+        :param single_pass_ocr:     <bool>  Whether to OCR all the cropped images of a PDF in one tesseract call,
+                                            words are assigned back to categories by their bounding boxes
+                                            [DEFAULT] False
+        :param ocr_backend:         <str>   "pytesseract" or "tesserocr" (in-process, trained data loaded once)
+                                            [DEFAULT] "pytesseract"
+                                            falls back to "pytesseract" if tesserocr is not installed or fails to
+                                            initiate (e.g. invalid trained data path)
+        :param tessdata_path:       <str>   path of the trained data of "tesserocr", e.g. ".../share/tessdata/"
+                                            [DEFAULT] None, the default one of tesserocr ("TESSDATA_PREFIX")
+        :param zero_copy:           <bool>  Whether to hand the printed IMG over as an array on the samples of the
+                                            pixmap (GrayScale, cropped images being views of it), instead of PNG data
+                                            [DEFAULT] True
+                                            only if cache_img_stream
+        :param render_zoom:         <float> zoom of printing PDFs to IMGs for OCR (1 for 72 dpi)
+                                            [DEFAULT] 5
+        :param locate_zoom:         <float> zoom of a low-resolution page printed only to locate the templates,
+                                            then only the cropped categories are printed at "render_zoom"
+                                            [DEFAULT] None (print the whole page at "render_zoom"), 2 recommended
+        :param coarse_to_fine:      <bool>  Whether to locate the templates on a downsampled page first,
+                                            refined at full resolution around the coarse locations (templates not
+                                            clearly found are searched on the whole page), as locate_full() gives
+                                            [DEFAULT] False (search the whole page at full resolution)
+        :param layout_cache_size:   <int>   max layouts (locations of the templates) cached, a page of a cached layout
+                                            is verified around the cached locations, instead of searched
+                                            [DEFAULT] 8
+                                            0       no cache
+        :param ocr_cache_file:      <str>   (relative to "root") SQLite file of OCRed texts, keyed by the hash of the
+                                            cropped images, shared across runs and worker processes
+                                            [DEFAULT] None (no cache)
+        :param ocr_cache_size:      <int>   max OCRed texts cached, least recently used ones are evicted
+                                            [DEFAULT] 100000
+        :param result_store_file:   <str>   (relative to "root") JSON Lines file where the parsed results are kept,
+                                            along with "<result_store_file>.progress" of the progress, to resume from
+                                            [DEFAULT] None (kept in the cache, deleted after execution)
+        :param resume:              <bool>  Whether to resume from "result_store_file": teams parsed are skipped,
+                                            teams failed are retried, others handled before the interruption
+                                            (e.g. non-existent teams) are skipped, "result_store_file" required
+                                            [DEFAULT] False (start over, "result_store_file" is cleared)
+        :param checkpoint_interval: <int>   number of teams handled between two saves of the progress
+                                            [DEFAULT] 100
+        :param profile:             <bool>  Whether to time the stages (requesting, printing, locating, cropping,
+                                            OCR of each category, storing), reported with p50 / p95 / max
+                                            [DEFAULT] False (stages not timed, no overhead)
+        :param metrics_filename:    <str>   (relative to "root") local path where the JSON of the timings is stored
+                                            [DEFAULT] None (reported only), only if "profile"
         :param _online_max_conti_err <int>  for online parser only, maximum number of continuous errors
                                             [DEFAULT] 1000
         :param _online_timeout      <float> for online parser only, timeout in seconds
                                             [DEFAULT] 5
         :param _online_max_attempts <int>   for online parser only, max failure attempts
                                             [DEFAULT] 2
+        :param _online_pipeline_workers <dict> for online parser only, run as a pipeline of stages, given the
+                                            number of threads of each stage, e.g.
+                                            {"fetch": 4, "render": 1, "crop": 1, "ocr": 2}
+                                            [DEFAULT] None (no pipeline)
+        :param _online_pipeline_queue_size <int> for online parser only, capacity of the queue before each stage
+                                            [DEFAULT] 4
+        :param _online_pack_store   <str>   for online parser only, (relative to "root") path (without extension) of a
+                                            compressed, de-duplicated store of the PDFs (shared with Crawler.py),
+                                            PDFs are read from it if stored, or requested and added to it otherwise
+                                            [DEFAULT] None (PDFs requested and thrown away)
         """
         # [VALIDATION] root
         if not os.path.exists(root):
@@ -95,6 +188,12 @@ class PrizeParser:
         self._logger_from_default_or_src = bool(logger is not None)
         self.logger = self.initiate_logging() if not self._logger_from_default_or_src else logger
 
+        # [VALIDATION] resume
+        if resume and not result_store_file:
+            msg = "No Result Store File to Resume from"
+            self.logger.critical(msg)
+            raise ParsingError(msg)
+
         # [OPERATION] Move to Workspace
         os.chdir(self.root)
         self.logger.info("Working at %s" % self.root)
@@ -110,29 +209,58 @@ class PrizeParser:
 
         # [PATH] templates
         self.templates_path = templates_path
-        self.templates_names = os.listdir(self.templates_path)
-        self.templates, self.templates_shape = self.initiate_templates()
+        self.templates_names = sorted(os.listdir(self.templates_path))  # "0 known.png", "1 advisor.png", ...
+        self.render_zoom = render_zoom  # templates are resized to the zooms
+        self.locate_zoom = locate_zoom
+        self.templates, self.templates_shape, self.templates_masks = self.initiate_templates()
+        self.locate_templates = self.initiate_locate_templates()
+        self.coarse_templates = self.initiate_locate_templates(self.render_zoom / self._PYRAMID_SCALE)
 
         # [PATH] cache
         self.cache_path = "cache_" + datetime.now().strftime("%Y%m%d%H%M%S") + "/"
         os.mkdir(self.cache_path)
-        self.cache_result_file = open(os.path.join(self.cache_path, "_cache_result.txt"), "w+")
+        self.result_store_file = result_store_file
+        self.resume = resume
+        if self.result_store_file and not self.resume:  # start over
+            for _file in [self.result_store_file, self.result_store_file + ".progress"]:
+                if os.path.exists(_file):
+                    os.remove(_file)
+        self.result_store = ResultStore(self.result_store_file if self.result_store_file
+                                        else os.path.join(self.cache_path, "_cache_result.jsonl"))
 
         # [KWARGS] kwargs
         self.delete_cache = delete_cache  # "False" for DEBUG only
         self.cache_img_stream = cache_img_stream  # using stream for cropped image if True else False
         self.report_filename = report_filename  # File Initialization Recommended
         self.result_filename = result_filename  # File Initialization Recommended
+        self.parallel_workers = parallel_workers if parallel_workers is not None else os.cpu_count()
+        self.use_text_layer = use_text_layer
+        self.single_pass_ocr = single_pass_ocr
+        self.zero_copy = zero_copy
+        self.ocr_backend = ocr_backend
+        self.tessdata_path = tessdata_path
+        self.ocr_cache_file = ocr_cache_file
+        self.ocr_cache_size = ocr_cache_size
+        self.coarse_to_fine = coarse_to_fine
+        self.layout_cache_size = layout_cache_size
+        self.layout_cache = self.initiate_layout_cache()
+        self.ocr_engine = self.initiate_ocr_engine()
         self._online_max_conti_err = _online_max_conti_err  # for online parser only
         self._online_timeout = _online_timeout  # for online parser only
         self._online_max_attempts = _online_max_attempts  # for online parser only
+        self._online_pipeline_workers = _online_pipeline_workers  # for online parser only
+        self._online_pipeline_queue_size = _online_pipeline_queue_size  # for online parser only
+        self.requester = Requester(timeout=_online_timeout)  # for online parser only, keep-alive connections
+        self._online_pack_store = _online_pack_store  # for online parser only
+        self.pack_store = PackStore(_online_pack_store) if _online_pack_store else None
         # file initialization
         for _file in [self.report_filename, self.result_filename]:
             if os.path.exists(_file):
                 os.remove(_file)
 
         # set PDF -> IMG resize/rotation param
-        zoom_x, zoom_y, rotation_angle = 5, 5, 0
+        zoom_x, zoom_y, rotation_angle = self.render_zoom, self.render_zoom, 0
+        self._pdf_img_trans_param = (zoom_x, zoom_y, rotation_angle)  # for worker processes to rebuild the matrix
         self.pdf_img_trans = fitz.Matrix(
             zoom_x, zoom_y).preRotate(rotation_angle)
 
@@ -148,6 +276,16 @@ class PrizeParser:
         self.failed_list = []
         self.start_time = datetime.now()
 
+        # for resume & checkpoints
+        self.checkpoint_interval = checkpoint_interval
+        self._last_handled, self._unsaved_cnt = None, 0
+        self.resumed_progress = self.load_progress() if self.resume else None
+
+        # for profiling
+        self.profile = profile
+        self.metrics_filename = metrics_filename
+        self.profiler = self.initiate_profiler()
+
         self.logger.debug("Parser Class Initiated")
         self.report_init()
 
@@ -179,15 +317,82 @@ class PrizeParser:
 
         return _logger
 
+    # zoom of the printed IMGs where the templates are cut from, and where the boundaries of crop_img() are given
+    _TEMPLATE_ZOOM = 5
+    # downsampling of the page for coarse-to-fine locating in crop_img()
+    _PYRAMID_SCALE = 4
+
     def initiate_templates(self):
         templates = []
         templates_shape = []  # y * x (e.g. 60,197)
+        templates_masks = []  # <numpy.ndarray> of <bool>, y * x, True for the glyphs (black) to be deleted
         for tn in self.templates_names:
             template = cv2.imread(os.path.join(self.templates_path, tn), 0)
+            template = self.resize_template(template, self.render_zoom)
             templates.append(template)
             templates_shape.append(template.shape)
+            templates_masks.append(template < 250)
         self.logger.debug("Parser Class Initiating: Templates Read")
-        return templates, templates_shape
+        return templates, templates_shape, templates_masks
+
+    def initiate_locate_templates(self, zoom=None):
+        """
+        :param zoom:    <float> zoom of the templates
+                        None (default) for self.locate_zoom
+        :return:        <list> of templates resized to "zoom", to locate on the low-resolution pages
+                        None if no "zoom" is given and no self.locate_zoom
+        """
+        zoom = self.locate_zoom if zoom is None else zoom
+        if not zoom:
+            return None
+        return [self.resize_template(cv2.imread(os.path.join(self.templates_path, tn), 0), zoom)
+                for tn in self.templates_names]
+
+    def initiate_layout_cache(self):
+        """
+        :return:    <LayoutCache> of templates at self.render_zoom, None if no self.layout_cache_size
+        """
+        if not self.layout_cache_size:
+            return None
+        margin = int(4 * self.render_zoom)  # 20 pixels at zoom 5
+        return LayoutCache(self.templates, capacity=self.layout_cache_size, margin=margin)
+
+    def initiate_ocr_engine(self):
+        """
+        :return:    OCR engine of self.ocr_backend, wrapped by a <CachedEngine> if self.ocr_cache_file is given
+        """
+        engine = create_ocr_engine(self.ocr_backend, self.logger, self.tessdata_path)
+        if self.ocr_cache_file:
+            engine = CachedEngine(engine, self.ocr_cache_file, capacity=self.ocr_cache_size)
+        return engine
+
+    # methods timed if profiled, see initiate_profiler()
+    _profiled_stages = ("request_pdf_stream", "translate_text_layer", "pdf_to_image", "pdf_to_cropped_imgs",
+                        "crop_img", "locate_full", "locate_coarse_to_fine", "imgs_to_texts",
+                        "update_res_to_cache", "cache_to_json")
+
+    def initiate_profiler(self):
+        """
+        time the stages (self._profiled_stages, and "img_to_text:<category>" of each category) if self.profile
+        :return:    <StageProfiler> None if not self.profile (stages not wrapped, no overhead)
+        """
+        if not self.profile:
+            return None
+        profiler = StageProfiler()
+        for stage in self._profiled_stages:
+            setattr(self, stage, profiler.wrap(stage, getattr(self, stage)))
+        return profiler
+
+    def resize_template(self, template, zoom):
+        """
+        :param template:    <numpy.ndarray> template at self._TEMPLATE_ZOOM
+        :param zoom:        <float> target zoom
+        :return:            <numpy.ndarray> resized template
+        """
+        if zoom == self._TEMPLATE_ZOOM:
+            return template
+        scale = zoom / self._TEMPLATE_ZOOM
+        return cv2.resize(template, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
 
     def report_init(self):
         out_str = "\n==============================\n" \
@@ -202,10 +407,27 @@ class PrizeParser:
                   "\tstream image cache:\t%s\n" \
                   "\treport filename:\t%s\n" \
                   "\tresult filename:\t%s\n" \
+                  "\tparallel workers:\t%d\n" \
+                  "\tuse text layer:\t\t%s\n" \
+                  "\tsingle pass ocr:\t%s\n" \
+                  "\tocr backend:\t\t%s\n" \
+                  "\tzero copy:\t\t\t%s\n" \
+                  "\trender zoom:\t\t%s\n" \
+                  "\tlocate zoom:\t\t%s\n" \
+                  "\tcoarse to fine:\t\t%s\n" \
+                  "\tlayout cache size:\t%d\n" \
+                  "\tocr cache file:\t\t%s\n" \
+                  "\tocr cache size:\t\t%d\n" \
+                  "\tresult store file:\t%s\n" \
+                  "\tresume:\t\t\t\t%s\n" \
+                  "\tprofile:\t\t\t%s\n" \
                   "[ONLINE ONLY KWARGS]\n" \
                   "\tmax conti err cnt:\t%d\n" \
                   "\ttimeout:\t\t\t%d\n" \
                   "\tmax attempts:\t\t%d\n" \
+                  "\tpipeline workers:\t%s\n" \
+                  "\tpipeline queue:\t\t%d\n" \
+                  "\tpack store:\t\t\t%s\n" \
                   "==============================\n\n" \
                   % (self.start_time,
                      self.root,
@@ -217,7 +439,27 @@ class PrizeParser:
                      str(self.cache_img_stream).upper(),
                      self.report_filename,
                      self.result_filename,
-                     self._online_max_conti_err, self._online_timeout, self._online_max_attempts)
+                     self.parallel_workers,
+                     str(self.use_text_layer).upper(),
+                     str(self.single_pass_ocr).upper(),
+                     self.ocr_engine.name,
+                     str(self.zero_copy).upper(),
+                     self.render_zoom,
+                     self.locate_zoom if self.locate_zoom else "NONE",
+                     str(self.coarse_to_fine).upper(),
+                     self.layout_cache_size,
+                     self.ocr_cache_file if self.ocr_cache_file else "NONE",
+                     self.ocr_cache_size,
+                     self.result_store_file if self.result_store_file else "NONE",
+                     "%d parsed, %d failed" % (len(self.resumed_progress["parsed"]),
+                                               len(self.resumed_progress["failed"]))
+                     if self.resumed_progress else "FALSE",
+                     ("TRUE, metrics in %s" % self.metrics_filename if self.metrics_filename else "TRUE")
+                     if self.profile else "FALSE",
+                     self._online_max_conti_err, self._online_timeout, self._online_max_attempts,
+                     self._online_pipeline_workers if self._online_pipeline_workers else "NONE",
+                     self._online_pipeline_queue_size,
+                     self._online_pack_store if self._online_pack_store else "NONE")
         print(out_str)
         open(self.report_filename, "w", encoding="utf8").write(out_str)
 
@@ -233,6 +475,14 @@ class PrizeParser:
             out_str = "\n*** Online Parser Executed ***\n"
         open(self.report_filename, "a", encoding="utf8").write(out_str)
 
+    def report_pipeline(self, pipeline):
+        """
+        :param pipeline:    <Pipeline> executed pipeline, whose per-stage statistics are reported
+        """
+        out_str = "\n=== [PIPELINE STAGES] ===\n%s" % pipeline.report()
+        print(out_str)
+        open(self.report_filename, "a", encoding="utf8").write(out_str)
+
     def report_del(self):
         out_str = "\n\n=== [TIME EXECUTED] ===\n" \
                   "\t%s\n" \
@@ -250,12 +500,26 @@ class PrizeParser:
                          self.suc_cnt, self.suc_cnt / self.file_cnt * 100.,
                          _failed_cnt,
                          str(self.failed_list) if _failed_cnt else "")
+        if self.layout_cache is not None and self.layout_cache.hits + self.layout_cache.misses:
+            out_str += "\n\n=== [LAYOUT CACHE] ===\n%s" % self.layout_cache.report()
+        if isinstance(self.ocr_engine, CachedEngine):
+            out_str += "\n\n=== [OCR CACHE] ===\n%s" % self.ocr_engine.report()
+        if self.pack_store is not None:
+            out_str += "\n\n=== [PACK STORE] ===\n%s" % self.pack_store.report()
+        if self.profiler is not None:
+            out_str += "\n\n=== [PROFILE] ===\n%s" % self.profiler.report()
+            if self.metrics_filename:
+                self.profiler.dump(self.metrics_filename)
 
         print(out_str)
         open(self.report_filename, "a", encoding="utf8").write(out_str)
 
     def __del__(self):
-        self.cache_result_file.close()
+        if not hasattr(self, "result_store"):  # not initiated, e.g. invalid kwargs
+            return
+        self.result_store.close()
+        if self.pack_store is not None:
+            self.pack_store.close()
         if self.delete_cache:
             shutil.rmtree(self.cache_path)
             if os.path.exists(self.cache_path):
@@ -266,6 +530,131 @@ class PrizeParser:
         # Parser Class Destructed
         time.sleep(0.5)
 
+    # attributes shared with the worker processes, see _WorkerParser
+    _worker_attrs = ("root", "files_path", "templates_path", "templates_names", "cache_path",
+                     "delete_cache", "cache_img_stream", "use_text_layer", "single_pass_ocr", "ocr_backend",
+                     "tessdata_path", "zero_copy", "render_zoom", "locate_zoom", "coarse_to_fine", "layout_cache_size",
+                     "ocr_cache_file", "ocr_cache_size", "profile", "_pdf_img_trans_param", "res_info_dict")
+
+    def worker_settings(self):
+        """
+        :return:    <dict> picklable settings to initiate a _WorkerParser in a worker process
+        """
+        return {attr: getattr(self, attr) for attr in self._worker_attrs}
+
+    def worker_pool(self):
+        """
+        :return:    <concurrent.futures.ProcessPoolExecutor> whose processes translate PDFs, see _translate_in_worker()
+        """
+        return ProcessPoolExecutor(max_workers=self.parallel_workers,
+                                   initializer=_init_worker, initargs=(self.worker_settings(),))
+
+    def load_progress(self):
+        """
+        :return:    <dict> progress of the previous run of self.result_store_file:
+                        {"parsed": <set> of <int> team numbers, "failed": <list> of keys, "last": key/None}
+                    (key: <str> filename or <int> team number)
+        """
+        progress = {"parsed": set(self.result_store.team_numbers()), "failed": [], "last": None}
+        if os.path.exists(self.result_store_file + ".progress"):
+            with open(self.result_store_file + ".progress", "r") as f:
+                progress.update(json.load(f))
+        self.logger.info("Resuming: %d Parsed, %d Failed, Last Handled %s"
+                         % (len(progress["parsed"]), len(progress["failed"]), progress["last"]))
+        return progress
+
+    def resume_filter(self, keys):
+        """
+        :param keys:    <list> of <str> filenames or <int> team numbers to parse, in the order of the previous run
+        :return:        <list> of keys not yet handled, or failed in the previous run
+        """
+        if not self.resumed_progress:
+            return keys
+        keys = list(keys)
+        last = self.resumed_progress["last"]
+        last_idx = keys.index(last) if last in keys else -1
+        failed = set(self.resumed_progress["failed"])
+        out = []
+        for idx, key in enumerate(keys):
+            try:
+                team_number = key if isinstance(key, int) else int(key.split(".")[0])
+            except ValueError:  # invalid file, left to the parser
+                team_number = None
+            if team_number in self.resumed_progress["parsed"]:
+                continue
+            if idx <= last_idx and key not in failed:  # handled, e.g. non-existent
+                continue
+            out.append(key)
+        self.logger.info("Resuming: %d of %d to Parse" % (len(out), len(keys)))
+        return out
+
+    def checkpoint(self, key=None):
+        """
+        record "key" as handled (keys are handled in the order of the inputs),
+        and save the progress every self.checkpoint_interval keys, if self.result_store_file is given
+        :param key:     <str> filename or <int> team number handled
+                        None (default) to save the progress at once
+        """
+        if key is not None:
+            self._last_handled = key
+            self._unsaved_cnt += 1
+            if self._unsaved_cnt < self.checkpoint_interval:
+                return
+        if not self.result_store_file:
+            return
+        self.result_store.sync()
+        progress_file = self.result_store_file + ".progress"
+        with open(progress_file + ".tmp", "w") as f:
+            json.dump({"failed": self.failed_list, "last": self._last_handled}, f)
+        os.replace(progress_file + ".tmp", progress_file)
+        self._unsaved_cnt = 0
+        self.logger.debug("Progress Saved")
+
+    def collect_result(self, key, info, err, profile=None, counts=None):
+        """
+        collect the translated info (or error) of a team from a worker process, called in team order
+        :param key:     <str> filename or <int> team number, added to failed list on errors
+        :param info:    <dict> info of a team, None on errors
+        :param err:     <str> error message, None on success
+        :param profile: <dict> timings of the stages in the worker process, as returned by StageProfiler.pop()
+        :param counts:  <dict> hits and misses of the caches in the worker process, as returned by pop_cache_counts()
+        """
+        if profile and self.profiler is not None:
+            self.profiler.merge(profile)
+        if counts:
+            self.merge_cache_counts(counts)
+        if err is None:
+            try:
+                self.update_res_to_cache(info)
+                self.suc_cnt += 1
+                self.logger.info("Parser Finished for %s" % key)
+                return
+            except Exception as _err:
+                err = str(_err)
+        self.failed_list.append(key)
+        self.logger.error("[ERROR] %s" % err)
+
+    def pop_cache_counts(self):
+        """
+        :return:    <dict> {"layout": (hits, misses), "ocr": (hits, misses)} of the caches since the last pop,
+                    to be merged into the main parser by self.merge_cache_counts(), the caches of None omitted
+        """
+        counts = {}
+        if self.layout_cache is not None:
+            counts["layout"] = self.layout_cache.pop_counts()
+        if isinstance(self.ocr_engine, CachedEngine):
+            counts["ocr"] = self.ocr_engine.pop_counts()
+        return counts
+
+    def merge_cache_counts(self, counts):
+        """
+        :param counts:  <dict> as returned by self.pop_cache_counts() (of a worker process)
+        """
+        if "layout" in counts and self.layout_cache is not None:
+            self.layout_cache.merge_counts(counts["layout"])
+        if "ocr" in counts and isinstance(self.ocr_engine, CachedEngine):
+            self.ocr_engine.merge_counts(counts["ocr"])
+
     def img_to_text(self, img_target):
         """
         OCR image
@@ -286,14 +675,71 @@ class PrizeParser:
         else:  # Recommended: using stream while passing cropped images
             im = img_target
 
-        text = pytesseract.image_to_string(im)
+        text = self.ocr_engine.image_to_string(im)
         # print(text)
+        text = self.process_text(text)
+        self.logger.debug("\tImg OCR Done")
+        return text
+
+    def imgs_to_texts(self, cropped_imgs):
+        """
+        OCR all the cropped images of a PDF in a single tesseract call:
+            images are stacked vertically (separated by blank rows) and words are assigned back to the categories
+            by the vertical centers of their bounding boxes
+        :param cropped_imgs:    <dict>  {"students":<*>, "advisor":<*>, "advisor_type":<*>/None,
+                                            "school":<*>, "prize":<*>}, as returned by self.crop_img()
+        :return:                <dict>  {"students":"...", "advisor":"...", "advisor_type":"..."/None,
+                                            "school":"...", "prize":"..."}, texts as self.img_to_text()
+        """
+        _GAP = 40  # blank rows between images
+
+        imgs, spans = [], {}  # spans: {category: (y_start, y_end)} in the stacked image
+        height = 0
+        for category, img in cropped_imgs.items():
+            if img is None:
+                continue
+            if not self.cache_img_stream:  # NOT Recommended: not using stream while passing cropped images
+                img = cv2.imread(os.path.join(self.cache_path, img), cv2.IMREAD_GRAYSCALE)
+            imgs.append(img)
+            spans[category] = (height, height + img.shape[0])
+            height += img.shape[0] + _GAP
+        width = max(img.shape[1] for img in imgs)
+        stacked = np.full((height, width), 255, dtype=np.uint8)
+        for img, (y_start, y_end) in zip(imgs, spans.values()):
+            stacked[y_start:y_end, :img.shape[1]] = img
+
+        data = self.ocr_engine.image_to_data(stacked)
+        lines = {}  # {category: {(block, par, line): [(left, word), ...]}}
+        for idx, word in enumerate(data["text"]):
+            if not word.strip():
+                continue
+            y_center = data["top"][idx] + data["height"][idx] / 2
+            for category, (y_start, y_end) in spans.items():
+                if y_start <= y_center < y_end:
+                    line_key = (data["block_num"][idx], data["par_num"][idx], data["line_num"][idx])
+                    lines.setdefault(category, {}).setdefault(line_key, []).append(
+                        (data["top"][idx], data["left"][idx], word))
+                    break
+
+        texts = dict.fromkeys(cropped_imgs.keys())
+        for category in spans:
+            _lines = sorted(lines.get(category, {}).values(), key=lambda _ws: min(_w[0] for _w in _ws))
+            texts[category] = self.process_text(
+                "\n".join(" ".join(_w[2] for _w in sorted(_ws, key=lambda _w: _w[1])) for _ws in _lines))
+        self.logger.debug("\tImgs OCR Done (Single Pass)")
+        return texts
+
+    @staticmethod
+    def process_text(text):
+        """
+        :param text:    <str> OCRed or extracted text
+        :return:        <str> text after "process" --- remove duplicate " ", "\n"
+        """
         text = text.strip()
         text = re.sub(' \\n', '\n', text)
         text = re.sub('\\n ', '\n', text)
         text = re.sub(' {2,}', ' ', text)
         text = re.sub('\\n{2,}', '\n', text)
-        self.logger.debug("\tImg OCR Done")
         return text
 
     def pdf_to_image(self, pdf_name=None, pdf_stream=None, fs_team_id=None):
@@ -307,6 +753,7 @@ class PrizeParser:
                             None (default)
         :return:            1. if not self.cache_img_stream: <str> the filename of the printed IMG (GrayScale)
                             2. if     self.cache_img_stream: <bytes> data of PNG in bytes of the printed IMG (GrayScale)
+                                if    self.zero_copy: <PixmapArray> of the printed IMG (GrayScale)
 
         Note:   If either
                     1. either param is given
@@ -323,6 +770,12 @@ class PrizeParser:
         else:  # pdf_stream is not None
             pdf = self.pdf_obj_stream(pdf_stream)
 
+        if self.cache_img_stream and self.zero_copy:  # Recommended: handing over the samples, no encoding
+            res = pixmap_to_array(pdf[0].getPixmap(matrix=self.pdf_img_trans, colorspace=fitz.csGRAY, alpha=False))
+            pdf.close()
+            self.logger.debug("\tPDF Printed To Array")
+            return res
+
         pm = pdf[0].getPixmap(matrix=self.pdf_img_trans, alpha=False)
         if not self.cache_img_stream:  # NOT Recommended: not using stream as input for further cropping
             out_path = self.cache_path
@@ -336,6 +789,75 @@ class PrizeParser:
         self.logger.debug("\tPDF Printed To PNG")
         return res
 
+    def pdf_to_texts(self, pdf_name=None, pdf_stream=None):
+        """
+        read the texts of the categories directly from the text layer of Page 0 of pdf, without printing and OCR
+        words are assigned to categories by the lines of the fixed sentences, as the templates in self.crop_img():
+            "Be It Known That The Team Of", "With * Advisor", "Of", "Was Designated As"
+        :param pdf_name:    <str> filename (without path) of the PDF file
+                            None (default)
+        :param pdf_stream:  <b str> binary stream of the PDF
+                            None (default)
+        :return:            <dict>  {"students":"...",
+                                        "advisor":"...", "advisor_type":"..."/None,
+                                        "school":"...", "prize":"..."}
+                            None if no usable text layer exists
+        """
+        pdf = self.pdf_obj_file(pdf_name) if pdf_name else self.pdf_obj_stream(pdf_stream)
+        words = pdf[0].getText("words")  # (x0, y0, x1, y1, word, block_no, line_no, word_no)
+        pdf.close()
+
+        # boundaries of self.crop_img(), in PDF points
+        _X = (700 / self._TEMPLATE_ZOOM, 3800 / self._TEMPLATE_ZOOM)
+        _YMAX = 2200 / self._TEMPLATE_ZOOM
+        _STUDENTS_MAX_H = 400 / self._TEMPLATE_ZOOM
+
+        # group words into lines, from top to bottom
+        lines = {}
+        for x0, y0, x1, y1, word, block_no, line_no, _ in words:
+            if _X[0] <= (x0 + x1) / 2 <= _X[1]:
+                lines.setdefault((block_no, line_no), []).append((x0, y0, y1, word))
+        lines = sorted(([(_w[0], _w[3]) for _w in sorted(_ws)],  # words from left to right
+                        min(_w[1] for _w in _ws), max(_w[2] for _w in _ws)) for _ws in lines.values())
+        lines.sort(key=lambda _l: _l[1])  # (<list> of (x0, word), y0, y1)
+
+        def _find(cond, start=0):
+            for _idx in range(start, len(lines)):
+                if cond([_w[1] for _w in lines[_idx][0]]):
+                    return _idx
+            return None
+
+        known = _find(lambda _ws: "Known" in _ws and "Team" in _ws)
+        if known is None:
+            self.logger.debug("\tNo Usable Text Layer")
+            return None
+        of = _find(lambda _ws: "Of" == _ws[0], known + 1)
+        prize = _find(lambda _ws: "Designated" in _ws, known + 1)
+        advisor = _find(lambda _ws: "Advisor" in _ws, known + 1)
+        if of is None or prize is None or of > prize:
+            self.logger.debug("\tNo Usable Text Layer")
+            return None
+
+        def _text(_lines):
+            return self.process_text("\n".join(" ".join(_w[1] for _w in _l[0]) for _l in _lines))
+
+        texts = {}
+        # handle case where "with * advisor" missed
+        if advisor is None or advisor > of:
+            cut = lines[known][2] + _STUDENTS_MAX_H
+            texts["students"] = _text(_l for _l in lines[known + 1:of] if _l[1] < cut)
+            texts["advisor"] = _text(_l for _l in lines[known + 1:of] if _l[1] >= cut)
+            texts["advisor_type"] = None
+        else:
+            texts["students"] = _text(lines[known + 1:advisor])
+            texts["advisor"] = _text(lines[advisor + 1:of])
+            texts["advisor_type"] = _text(lines[advisor:advisor + 1])
+        texts["school"] = _text([(lines[of][0][1:], 0, 0)] + lines[of + 1:prize])  # delete "Of"
+        texts["prize"] = _text(_l for _l in lines[prize + 1:] if _l[1] < _YMAX)
+
+        self.logger.debug("\tText Layer Read")
+        return texts
+
     def pdf_obj_file(self, pdf_name):
         """
         :param pdf_name:    <str> the filename (without path) of the source PDF
@@ -360,6 +882,7 @@ class PrizeParser:
                                     <str> the filename (without path) of the printed IMG (GrayScale) of the PDF
                             2. if     self.cache_img_stream:
                                     <bytes> data of PNG in bytes of the printed IMG (GrayScale) of the PDF
+                                    <PixmapArray> of the printed IMG (GrayScale) if self.zero_copy
 
         :return:            1. if not self.cache_img_stream:
                                     <dict>  {"students":"...",
@@ -373,14 +896,76 @@ class PrizeParser:
         Note: if "img_name" is None, an error will be raised
         * if the input image is not GrayScale(RGB/...), notice that OpenCV reads in BGR
         """
-        if not page_img:
+        if page_img is None or 0 == len(page_img):
             raise IMGCropperError("No Input Page IMG")
 
+        img = self.load_page_img(page_img)
+        if not img.flags.writeable:  # samples copied by PyMuPDF of older versions are read-only
+            img = img.copy()
+
+        max_fits = self.layout_cache.lookup(img) if self.layout_cache is not None else None
+        if max_fits is None:  # not of a cached layout
+            if self.coarse_to_fine:
+                max_fits = self.locate_coarse_to_fine(img)
+            else:
+                max_fits = self.locate_full(img)
+            if self.layout_cache is not None:
+                self.layout_cache.add(max_fits)
+        max_fits = self.check_advisor(img, self.templates, list(max_fits))
+
+        # delete "Of"
+        self.erase_template(img, 2, max_fits[2])
+        # delete "Was Designated As"
+        self.erase_template(img, 3, max_fits[3])
+
+        # calculating boundaries
+        _X, _Y = self.calc_boundaries(max_fits)
+
+        # self.create_logger.debug("Created")
+
+        out_imgs = _Y  # using the same <dict> to decrease space usage (boundaries => image name / ndarray)
+        out_path = self.cache_path  # for NOT-Recommended Non-Stream Only
+        for item in _Y.items():
+            if not item[1]:  # None for some advisor_type
+                continue
+            cropped_img = img[item[1][0]:item[1][1], _X[0]:_X[1]]  # [y, x]
+
+            if not self.cache_img_stream:  # NOT Recommended: not using stream as input while cropping
+                out_name = page_img.split(".")[0] + "_" + item[0] + ".png"
+                out_imgs[item[0]] = out_name
+                cv2.imwrite(os.path.join(out_path, out_name), cropped_img)
+            else:  # Recommended: using stream as input while cropping
+                out_imgs[item[0]] = cropped_img
+
+        self.logger.debug("\tPage Img Cropped")
+        return out_imgs
+
+    def erase_template(self, img, idx, loc):
+        """
+        delete (as white) the glyphs of a template matched on an IMG, in place
+        :param img:     <numpy.ndarray> GrayScale IMG, writeable
+        :param idx:     <int> index of the template, see self.templates_names
+        :param loc:     <tuple> best fit location x * y of the template on "img"
+        """
+        window = img[loc[1]:loc[1] + self.templates_shape[idx][0], loc[0]:loc[0] + self.templates_shape[idx][1]]
+        window[self.templates_masks[idx][:window.shape[0], :window.shape[1]]] = 255  # clipped at the borders
+
+    def load_page_img(self, page_img):
+        """
+        :param page_img:    printed IMG of the PDF, as returned by self.pdf_to_image()
+        :return:            <numpy.ndarray> GrayScale page, y * x (not copied if handed over as an array)
+        """
         if not self.cache_img_stream:  # NOT Recommended: not using stream as input while cropping
-            img = cv2.imread(os.path.join(self.cache_path, page_img), cv2.IMREAD_GRAYSCALE)
-        else:  # Recommended: using stream as input while cropping
-            img = cv2.imdecode(np.frombuffer(page_img, dtype=np.uint8), cv2.IMREAD_GRAYSCALE)
+            return cv2.imread(os.path.join(self.cache_path, page_img), cv2.IMREAD_GRAYSCALE)
+        if isinstance(page_img, np.ndarray):  # Recommended: zero copy
+            return page_img
+        return cv2.imdecode(np.frombuffer(page_img, dtype=np.uint8), cv2.IMREAD_GRAYSCALE)
 
+    def locate_full(self, img):
+        """
+        :param img:     <numpy.ndarray> GrayScale page at self.render_zoom
+        :return:        <list> of best fit locations x * y of the templates, searched on the whole page
+        """
         max_fits = []  # best it locations: x * y [e.g. 1692,752]
         # self.template_shapes: <list> y * x [e.g. 60,197]
         for idx, template in enumerate(self.templates):
@@ -388,19 +973,143 @@ class PrizeParser:
             min_val, max_val, min_loc, max_loc = cv2.minMaxLoc(match)
             # print(max_loc)
             max_fits.append(max_loc)
+        return max_fits
 
-        # delete "Of"
-        _del_as_black = np.where(self.templates[2] < 250)  # y * x
-        img[_del_as_black[0] + max_fits[2][1], _del_as_black[1] + max_fits[2][0]] = 255
-        # delete "Was Designated As"
-        _del_as_black = np.where(self.templates[2] < 250)  # y * x
-        img[_del_as_black[0] + max_fits[2][1], _del_as_black[1] + max_fits[2][0]] = 255  # y * x
+    def locate_coarse_to_fine(self, img, top_k=5, threshold=0.8):
+        """
+        locate each template on the whole page downsampled by self._PYRAMID_SCALE,
+        then refine at full resolution in windows around its "top_k" best coarse locations (see self.top_locations())
+        a template scoring (TM_CCOEFF_NORMED) below "threshold" at its refined location is not clearly on the page
+        (e.g. "With * Advisor" missed), and is searched on the whole page at full resolution instead,
+        so that the locations are those of self.locate_full()
+        :param img:         <numpy.ndarray> GrayScale page at self.render_zoom
+        :param top_k:       <int> number of coarse candidates refined of each template
+        :param threshold:   <float> min TM_CCOEFF_NORMED score of a refined location to be kept
+        :return:            <list> of best fit locations x * y of the templates, as self.locate_full()
+        """
+        scale = self._PYRAMID_SCALE
+        small = cv2.resize(img, (img.shape[1] // scale, img.shape[0] // scale), interpolation=cv2.INTER_AREA)
+        margin = 2 * scale  # error of the coarse locations
+        max_fits = []
+        for coarse_template, template, (_h, _w) in zip(self.coarse_templates, self.templates, self.templates_shape):
+            candidates = self.top_locations(cv2.matchTemplate(small, coarse_template, cv2.TM_CCOEFF),
+                                            coarse_template.shape, top_k)
+            best_val, best_loc = None, None
+            for _x, _y in candidates:
+                x0, y0 = max(0, _x * scale - margin), max(0, _y * scale - margin)
+                x1, y1 = min(img.shape[1], _x * scale + _w + margin), min(img.shape[0], _y * scale + _h + margin)
+                if y1 - y0 < _h or x1 - x0 < _w:
+                    continue
+                match = cv2.matchTemplate(img[y0:y1, x0:x1], template, cv2.TM_CCOEFF)
+                min_val, max_val, min_loc, max_loc = cv2.minMaxLoc(match)
+                if best_val is None or max_val > best_val:
+                    best_val, best_loc = max_val, (max_loc[0] + x0, max_loc[1] + y0)
+            if best_loc is None or threshold > cv2.matchTemplate(
+                    img[best_loc[1]:best_loc[1] + _h, best_loc[0]:best_loc[0] + _w], template,
+                    cv2.TM_CCOEFF_NORMED)[0, 0]:
+                best_loc = cv2.minMaxLoc(cv2.matchTemplate(img, template, cv2.TM_CCOEFF))[3]
+            max_fits.append(best_loc)
+        return max_fits
 
-        # calculating boundaries
-        _X = (700, 3800)
-        _YMAX = 2200
+    @staticmethod
+    def top_locations(match, shape, top_k):
+        """
+        :param match:   <numpy.ndarray> result of cv2.matchTemplate(), modified in place
+        :param shape:   <tuple> y * x shape of the template
+        :param top_k:   <int> number of locations
+        :return:        <list> of the "top_k" best fit locations x * y, far enough from each other
+                        (the neighborhood of a location, half of the template, is suppressed for the next one)
+        """
+        _h, _w = shape
+        locations = []
+        for _ in range(top_k):
+            min_val, max_val, min_loc, max_loc = cv2.minMaxLoc(match)
+            locations.append(max_loc)
+            match[max(0, max_loc[1] - _h // 2):max_loc[1] + _h // 2 + 1,
+                  max(0, max_loc[0] - _w // 2):max_loc[0] + _w // 2 + 1] = min_val
+        return locations
+
+    @staticmethod
+    def locate_in_bands(img, templates, threshold=0.7):
+        """
+        locate the templates on a (low-resolution) page, each restricted to its expected vertical band:
+            "Be It Known That The Team Of"  the whole page
+            "Was Designated As"             below "Be It Known That The Team Of"
+            "Of"                            between "Be It Known That The Team Of" and "Was Designated As",
+                                            too small to be located on the whole page
+            "With * Advisor"                between "Be It Known That The Team Of" and "Of",
+                                            if not clearly found, below "Of" (see self.check_advisor())
+        :param img:         <numpy.ndarray> GrayScale page
+        :param templates:   <list> of templates at the zoom of "img"
+        :param threshold:   <float> min TM_CCOEFF_NORMED score of "With * Advisor" to be kept,
+                            lower than at self.render_zoom, as the glyphs of the page and the templates are blurred
+                            (about 0.78 at zoom 1 if found, 0.6 if missed)
+        :return:            <list> of best fit locations x * y of the templates, at the zoom of "img"
+        """
+        max_fits = [None] * len(templates)
+
+        def _match(idx, top=0, bottom=None):
+            bottom = img.shape[0] if bottom is None else max(bottom, top + templates[idx].shape[0])
+            bottom = min(bottom, img.shape[0])
+            top = min(top, bottom - templates[idx].shape[0])
+            max_loc = cv2.minMaxLoc(cv2.matchTemplate(img[top:bottom], templates[idx], cv2.TM_CCOEFF))[3]
+            max_fits[idx] = (max_loc[0], max_loc[1] + top)
+
+        _match(0)
+        below_known = max_fits[0][1] + templates[0].shape[0]
+        _match(3, below_known)
+        _match(2, below_known, max_fits[3][1])
+        _match(1, below_known, max_fits[2][1])
+        return PrizeParser.check_advisor(img, templates, max_fits, threshold)
+
+    @staticmethod
+    def check_advisor(img, templates, max_fits, threshold=0.8):
+        """
+        "With * Advisor" is always matched somewhere, even on a page without it (e.g. on the name of a student),
+        it is kept only if scoring (TM_CCOEFF_NORMED) at least "threshold" above "Of",
+        otherwise it is missed, and located below "Of" instead (the case handled by self.calc_boundaries())
+        :param img:         <numpy.ndarray> GrayScale page
+        :param templates:   <list> of templates at the zoom of "img"
+        :param max_fits:    <list> of best fit locations x * y of the templates on "img", modified in place
+        :param threshold:   <float> min TM_CCOEFF_NORMED score of "With * Advisor" to be kept
+        :return:            <list> "max_fits"
+        """
+        (_x, _y), (_h, _w) = max_fits[1], templates[1].shape
+        if _y < max_fits[2][1] and threshold <= cv2.matchTemplate(
+                img[_y:_y + _h, _x:_x + _w], templates[1], cv2.TM_CCOEFF_NORMED)[0, 0]:
+            return max_fits
+        top = min(max_fits[2][1] + templates[2].shape[0], img.shape[0] - _h)
+        max_loc = cv2.minMaxLoc(cv2.matchTemplate(img[top:], templates[1], cv2.TM_CCOEFF))[3]
+        max_fits[1] = (max_loc[0], max_loc[1] + top)
+        return max_fits
+
+    def locate_boundaries(self, page):
+        """
+        print the page at self.locate_zoom (GrayScale) and locate the templates on it (see self.locate_in_bands())
+        :param page:    <fitz.Page> Page 0 of the PDF
+        :return:        <tuple> (_X, _Y) at self.render_zoom, as returned by self.calc_boundaries()
+        """
+        img = pixmap_to_array(page.getPixmap(matrix=fitz.Matrix(self.locate_zoom, self.locate_zoom),
+                                             colorspace=fitz.csGRAY, alpha=False))
+        max_fits = self.locate_in_bands(img, self.locate_templates)
+        scale = self.render_zoom / self.locate_zoom
+        max_fits = [(int(_x * scale), int(_y * scale)) for _x, _y in max_fits]  # best it locations: x * y
+        return self.calc_boundaries(max_fits)
+
+    def calc_boundaries(self, max_fits):
+        """
+        :param max_fits:    <list> of best fit locations x * y of the templates, at self.render_zoom
+        :return:            <tuple> (_X, _Y) at self.render_zoom:
+                                _X  <tuple> (x_start, x_end) of all the categories
+                                _Y  <dict>  {"students":(y_start, y_end),
+                                                "advisor":(...), "advisor_type":(...)/None,
+                                                "school":(...), "prize":(...)}
+        """
+        scale = self.render_zoom / self._TEMPLATE_ZOOM  # boundaries are given at the zoom of the templates
+        _X = (int(700 * scale), int(3800 * scale))
+        _YMAX = int(2200 * scale)
         _Y = {}  # stores the boundaries
-        max_intl = [400, 200, 200, 300]
+        max_intl = [int(400 * scale), int(200 * scale), int(200 * scale), int(300 * scale)]
         # handle case where "with * advisor" missed
         if max_fits[1][1] > max_fits[2][1]:
             cut = max_fits[0][1] + self.templates_shape[0][0] + max_intl[0]
@@ -414,24 +1123,61 @@ class PrizeParser:
         # _Y["school"] = (max_fits[2][1] + self.templates_shape[2][0], max_fits[3][1]) # no deletion "Of"
         _Y["school"] = (max_fits[2][1], max_fits[3][1])
         _Y["prize"] = (max_fits[3][1] + self.templates_shape[3][0], _YMAX)
+        return _X, _Y
 
-        # self.create_logger.debug("Created")
+    def pdf_to_cropped_imgs(self, pdf_name=None, pdf_stream=None, fs_team_id=None):
+        """
+        region-aware printing, instead of self.pdf_to_image() and self.crop_img():
+            1. print Page 0 of pdf at self.locate_zoom (GrayScale) to locate the templates
+            2. print only the boundaries of the categories at self.render_zoom
+        so that the whole page is never printed at the resolution for OCR
+        :param pdf_name:    <str> filename (without path) of the PDF file
+                            None (default)
+        :param pdf_stream:  <b str> binary stream of the PDF
+                            None (default)
+        :param fs_team_id:  <int> team number, given only when filestream is given
+                            None (default)
+        :return:            cropped IMGs of the PDF, as returned by self.crop_img()
+        """
+        if (not pdf_name) and (not pdf_stream):
+            raise PDF2IMGError("Neither Filename or Stream is Given")
+        if pdf_name and pdf_stream:
+            raise PDF2IMGError("Both Filename and Stream are Given")
+
+        pdf = self.pdf_obj_file(pdf_name) if pdf_name else self.pdf_obj_stream(pdf_stream)
+        page = pdf[0]
+
+        # locate on the low-resolution page, and scale the locations to self.render_zoom
+        _X, _Y = self.locate_boundaries(page)
 
         out_imgs = _Y  # using the same <dict> to decrease space usage (boundaries => image name / ndarray)
-        out_path = self.cache_path  # for NOT-Recommended Non-Stream Only
         for item in _Y.items():
             if not item[1]:  # None for some advisor_type
                 continue
-            cropped_img = img[item[1][0]:item[1][1], _X[0]:_X[1]]  # [y, x]
-
-            if not self.cache_img_stream:  # NOT Recommended: not using stream as input while cropping
-                out_name = page_img.split(".")[0] + "_" + item[0] + ".png"
-                out_imgs[item[0]] = out_name
-                cv2.imwrite(os.path.join(out_path, out_name), cropped_img)
-            else:  # Recommended: using stream as input while cropping
-                out_imgs[item[0]] = cropped_img
+            clip = fitz.Rect(_X[0] / self.render_zoom, item[1][0] / self.render_zoom,
+                             _X[1] / self.render_zoom, item[1][1] / self.render_zoom)
+            out_imgs[item[0]] = pixmap_to_array(
+                page.getPixmap(matrix=self.pdf_img_trans, clip=clip, colorspace=fitz.csGRAY, alpha=False))
+        pdf.close()
 
-        self.logger.debug("\tPage Img Cropped")
+        # delete "Of", re-located at self.render_zoom in the top of the school image
+        school = out_imgs["school"].copy()
+        _h, _w = self.templates_shape[2]
+        if school.shape[0] >= _h and school.shape[1] >= _w:
+            match = cv2.matchTemplate(school[:2 * _h], self.templates[2], cv2.TM_CCOEFF)
+            self.erase_template(school, 2, cv2.minMaxLoc(match)[3])
+        out_imgs["school"] = school
+
+        if not self.cache_img_stream:  # NOT Recommended: not using stream as input while OCR
+            out_prefix = pdf_name.split(".")[0] if pdf_name else "%d" % fs_team_id
+            for category, cropped_img in out_imgs.items():
+                if cropped_img is None:
+                    continue
+                out_name = out_prefix + "_" + category + ".png"
+                cv2.imwrite(os.path.join(self.cache_path, out_name), cropped_img)
+                out_imgs[category] = out_name
+
+        self.logger.debug("\tPDF Printed To Cropped IMGs")
         return out_imgs
 
     def parse_cache_2_get_result_info(self, cropped_imgs):
@@ -447,10 +1193,23 @@ class PrizeParser:
                         "advisor_type": ""/None, "advisor": "",
                         "school": "", "prize": ""}
         """
+        if self.single_pass_ocr:
+            return self.texts_to_result_info(self.imgs_to_texts(cropped_imgs).get)
+        if self.profiler is not None:  # timed per category
+            return self.texts_to_result_info(lambda category: self.profiler.call(
+                "img_to_text:%s" % category, self.img_to_text, cropped_imgs[category]))
+        return self.texts_to_result_info(lambda category: self.img_to_text(cropped_imgs[category]))
+
+    def texts_to_result_info(self, get_text):
+        """
+        :param get_text:    <function> category => <str> text of the category ("students", "advisor", ...),
+                                called in order, so that OCR stops early on parsing errors
+        :return:            <dict> info of a team (NO team number), as self.parse_cache_2_get_result_info()
+        """
         res_info = copy.deepcopy(self.res_info_dict)
 
         # +++ students names
-        _students = self.img_to_text(cropped_imgs["students"])
+        _students = get_text("students")
         students = _students.split("\n")
         st_cnt = len(students)
         if st_cnt > 3 or st_cnt < 1:
@@ -466,12 +1225,12 @@ class PrizeParser:
             pass
 
         # +++ advisor name
-        advisor = self.img_to_text(cropped_imgs["advisor"]).replace("\n", " ")
+        advisor = get_text("advisor").replace("\n", " ")
         advisor = re.sub(" {2,}", " ", advisor)
         res_info["advisor"] = advisor
 
         # +++ advisor type
-        _advisor_type = self.img_to_text(cropped_imgs["advisor_type"])
+        _advisor_type = get_text("advisor_type")
         if not _advisor_type:
             advisor_type = None
         elif "Faculty" in _advisor_type:
@@ -487,12 +1246,12 @@ class PrizeParser:
         res_info["advisor_type"] = advisor_type
 
         # +++ school
-        school = self.img_to_text(cropped_imgs["school"]).replace("\n", " ")
+        school = get_text("school").replace("\n", " ")
         school = re.sub(" {2,}", " ", school)
         res_info["school"] = school
 
         # +++ prize
-        prize = self.img_to_text(cropped_imgs["prize"])
+        prize = get_text("prize")
         res_info["prize"] = prize
 
         self.logger.debug("\tResult Information Parsed")
@@ -531,21 +1290,55 @@ class PrizeParser:
         if not (filename is None) ^ (filestream is None):
             raise PDF2IMGError("Both/Neither Filename, Stream are/is given")
 
-        page_img = self.pdf_to_image(pdf_name=filename, pdf_stream=filestream, fs_team_id=fs_team_id)
-        cropped_imgs = self.crop_img(page_img)
-
         if filename:
             team_number = int(filename.split(".")[0])
         else:
             team_number = fs_team_id
 
+        if self.use_text_layer:
+            res_info = self.translate_text_layer(filename=filename, filestream=filestream, team_number=team_number)
+            if res_info is not None:
+                return res_info
+
+        if self.locate_zoom:  # region-aware printing, no page IMG
+            cropped_imgs = self.pdf_to_cropped_imgs(pdf_name=filename, pdf_stream=filestream, fs_team_id=fs_team_id)
+            return self.ocr_cropped_imgs(None, cropped_imgs, team_number)
+
+        page_img = self.pdf_to_image(pdf_name=filename, pdf_stream=filestream, fs_team_id=fs_team_id)
+        cropped_imgs = self.crop_img(page_img)
+
+        return self.ocr_cropped_imgs(page_img, cropped_imgs, team_number)
+
+    def translate_text_layer(self, filename=None, filestream=None, team_number=None):
+        """
+        translate a PDF from its text layer, see self.pdf_to_texts()
+        :return:    <dict> info of a team, as returned by self.translate_pdf()
+                    None if no usable text layer exists
+        """
+        texts = self.pdf_to_texts(pdf_name=filename, pdf_stream=filestream)
+        if texts is None:
+            return None
+        res_info = self.texts_to_result_info(texts.get)
+        res_info["team_number"] = team_number
+        return res_info
+
+    def ocr_cropped_imgs(self, page_img, cropped_imgs, team_number):
+        """
+        OCR the cropped images of a PDF to get the info, and remove the used caches
+        :param page_img:        printed IMG of the PDF, as returned by self.pdf_to_image()
+                                None if printed by self.pdf_to_cropped_imgs()
+        :param cropped_imgs:    cropped IMGs of the PDF, as returned by self.crop_img()
+        :param team_number:     <int> team number
+        :return:                <dict> info of a team, as returned by self.translate_pdf()
+        """
         res_info = self.parse_cache_2_get_result_info(cropped_imgs)
         res_info["team_number"] = team_number
 
         # Remove the used caches
         if not self.cache_img_stream:  # NOT Recommended: not using stream as input while cropping
             used_files = list(cropped_imgs.values())
-            used_files.append(page_img)
+            if page_img is not None:
+                used_files.append(page_img)
             self.remove_used_cache(used_files)
 
         return res_info
@@ -558,38 +1351,18 @@ class PrizeParser:
                             "advisor_type": ""/None, "advisor": "", "school": "", "prize": ""}
         :return:        <int> length of successfully written string
         """
-        try:
-            wl = self.cache_result_file.write(str(info))
-        except UnicodeEncodeError:
-            wl = self.cache_result_file.write(str(info).encode("gbk", 'ignore').decode("gbk", "ignore"))
-        self.cache_result_file.write("\n")
-        self.cache_result_file.flush()
+        wl = self.result_store.append(info)
 
         self.logger.debug("\tInfo Result Updated to Cache")
         return wl
 
     def cache_to_json(self):
         """
-        read from cache to form json and save it
+        read from cache to form json and save it, streamed team by team (see ResultStore.export_json())
         """
         # {"team_number": 0000000,  "student1": "", "student2": "", "student3": "",
         #  "advisor_type": "",      "advisor": "",  "school": "",   "prize": ""}
-        json_details = {"fields": ["teams counts", "teams numbers",
-                                   "student1", "student2", "student3",
-                                   "advisor_type", "advisor", "school", "prize"],
-                        "teams counts": 0,
-                        "teams numbers": [],
-                        "info": []}
-        self.cache_result_file.seek(0, 0)
-        lines = self.cache_result_file.readlines()
-        json_details["teams counts"] = len(lines)
-        for line in lines:
-            info = eval(line)
-            json_details["teams numbers"].append(info["team_number"])
-            json_details["info"].append(info)
-
-        with open(self.result_filename, "w") as f:
-            json.dump(obj=json_details, fp=f, indent=4)
+        self.result_store.export_json(self.result_filename)
 
         self.logger.debug("Info Result Updated to JSON")
 
@@ -609,6 +1382,11 @@ class PrizeParser:
         self.report_exec(local=True)
         time.sleep(0.5)
 
+        fl_lst = self.resume_filter(fl_lst)
+        if self.parallel_workers:
+            self.local_parser_parallel(fl_lst)
+            return
+
         for file in tqdm(fl_lst):
             if not file.endswith(".pdf"):
                 self.logger.warning("Invalid File", file)
@@ -623,9 +1401,35 @@ class PrizeParser:
             except Exception as err:
                 self.failed_list.append(file)
                 self.logger.error("[ERROR] %s" % err)
+                self.checkpoint(file)
                 continue
             self.logger.info("Parser Finished for %s" % file)
+            self.checkpoint(file)
+
+        self.checkpoint()
+        self.cache_to_json()
+        self.report_del()
+
+    def local_parser_parallel(self, fl_lst):
+        """
+        local_parser() with PDFs translated by a pool of processes, results are collected in the order of "fl_lst"
+        :param fl_lst:      <list> of <str>, filename (without path) of local PDFs
+        """
+        files = []
+        for file in fl_lst:
+            if not file.endswith(".pdf"):
+                self.logger.warning("Invalid File %s" % file)
+                continue
+            files.append(file)
+
+        with self.worker_pool() as executor:
+            results = executor.map(_translate_in_worker, [(file, None, None) for file in files], chunksize=4)
+            for file, result in zip(files, tqdm(results, total=len(files))):
+                self.file_cnt += 1
+                self.collect_result(file, *result)
+                self.checkpoint(file)
 
+        self.checkpoint()
         self.cache_to_json()
         self.report_del()
 
@@ -635,6 +1439,12 @@ class PrizeParser:
         :param team_id:     <int> team number
         :return:            <b str> file stream
         """
+        if self.pack_store is not None:
+            content = self.pack_store.get(team_id)
+            if content is not None:
+                self.logger.debug("\tStream Read from Pack Store")
+                return content
+
         # url = "http://comap-math.com/mcm/2020Certs/%d.pdf" % team_id
         url = "http://comap-math.com/mcm/2019Certs/%d.pdf" % team_id
 
@@ -642,8 +1452,7 @@ class PrizeParser:
         attempts = 0
         while attempts <= self._online_max_attempts:
             try:
-                response = urllib.request.urlopen(url, timeout=self._online_timeout)
-                content = response.read()
+                content = self.requester.get(url, timeout=self._online_timeout)
                 break
             except urllib.error.HTTPError as err:  # 404
                 raise OnlineError(str(err))
@@ -657,6 +1466,8 @@ class PrizeParser:
                 continue
 
         self.logger.debug("\tStream Accessed at Attempt #%d" % attempts)
+        if self.pack_store is not None and content:
+            self.pack_store.put(team_id, content)
         return content
 
     def online_parser(self, team_id_lst):
@@ -668,6 +1479,14 @@ class PrizeParser:
         self.report_exec(online=True)
         time.sleep(0.5)
 
+        team_id_lst = self.resume_filter(team_id_lst)
+        if self._online_pipeline_workers:
+            self.online_parser_pipeline(team_id_lst)
+            return
+        if self.parallel_workers:
+            self.online_parser_parallel(team_id_lst)
+            return
+
         conti_err_cnt = 0
         max_conti_err_reached = False
         for team_id in tqdm(team_id_lst):
@@ -690,6 +1509,7 @@ class PrizeParser:
             except Exception as err:
                 self.logger.error("[ERROR] %s" % err)
                 conti_err_cnt += 1
+                self.checkpoint(team_id)
                 continue
 
             try:
@@ -699,13 +1519,176 @@ class PrizeParser:
             except Exception as err:
                 self.failed_list.append(team_id)
                 self.logger.error("[ERROR] %s" % err)
+                self.checkpoint(team_id)
                 continue
 
             self.logger.info("Parser Finished for %d" % team_id)
+            self.checkpoint(team_id)
+
+        self.checkpoint()
+        self.cache_to_json()
+        self.report_del()
 
+    def online_parser_parallel(self, team_id_lst):
+        """
+        online_parser() with PDFs translated by a pool of processes, while PDFs are requested in the main process
+        results are collected in the order of "team_id_lst", at most 2 * parallel_workers PDFs are queued
+        :param team_id_lst: <list> of <int> team numbers
+        """
+        conti_err_cnt = 0
+        queued = deque()  # (<int> team number, <Future>)
+        with self.worker_pool() as executor:
+            for team_id in tqdm(team_id_lst):
+                if conti_err_cnt >= self._online_max_conti_err:
+                    self.logger.critical(
+                        "Maximum Continuous Error Count (%d) Reached. To End Crawler Workflow"
+                        % self._online_max_conti_err)
+                    break
+                self.logger.info("Working on %d" % team_id)
+
+                try:
+                    content = self.request_pdf_stream(team_id)
+                    self.file_cnt += 1
+                    conti_err_cnt = 0
+                except Exception as err:
+                    self.logger.error("[ERROR] %s" % err)
+                    conti_err_cnt += 1
+                    continue
+
+                queued.append((team_id, executor.submit(_translate_in_worker, (None, content, team_id))))
+                while queued and (queued[0][1].done() or len(queued) >= 2 * self.parallel_workers):
+                    _team_id, future = queued.popleft()
+                    self.collect_result(_team_id, *future.result())
+                    self.checkpoint(_team_id)  # teams failed to fetch before are handled as well
+
+            while queued:
+                _team_id, future = queued.popleft()
+                self.collect_result(_team_id, *future.result())
+                self.checkpoint(_team_id)
+
+        self.checkpoint()
         self.cache_to_json()
         self.report_del()
 
+    def online_parser_pipeline(self, team_id_lst):
+        """
+        online_parser() as a pipeline of stages: fetch => render => crop => ocr
+        each stage runs in its own threads (self._online_pipeline_workers), connected by bounded queues,
+        so that requests go on during rendering and OCR, results are collected in the order of "team_id_lst"
+        :param team_id_lst: <list> of <int> team numbers
+        """
+        workers = self._online_pipeline_workers
+        pipeline = Pipeline([
+            Stage("fetch", lambda team_id, _: self.request_pdf_stream(team_id), workers.get("fetch", 1)),
+            Stage("render", self._pipeline_render, workers.get("render", 1)),
+            Stage("crop", self._pipeline_crop, workers.get("crop", 1)),
+            Stage("ocr", self._pipeline_ocr, workers.get("ocr", 1)),
+        ], queue_size=self._online_pipeline_queue_size)
+
+        conti_err_cnt = 0
+        for team_id, info, err, failed_stage in tqdm(pipeline.run(team_id_lst), total=len(team_id_lst)):
+            self.logger.info("Working on %d" % team_id)
+            if "fetch" == failed_stage:
+                self.logger.error("[ERROR] %s" % err)
+                conti_err_cnt += 1
+                if conti_err_cnt == self._online_max_conti_err:
+                    self.logger.critical(
+                        "Maximum Continuous Error Count (%d) Reached. To End Crawler Workflow"
+                        % self._online_max_conti_err)
+                    pipeline.stop()
+                self.checkpoint(team_id)
+                continue
+            self.file_cnt += 1
+            conti_err_cnt = 0
+            self.collect_result(team_id, info, None if err is None else str(err))
+            self.checkpoint(team_id)
+
+        self.checkpoint()
+        self.report_pipeline(pipeline)
+        self.cache_to_json()
+        self.report_del()
+
+    def _pipeline_render(self, team_id, content):
+        """
+        "render" stage of self.online_parser_pipeline()
+        :return:    <dict> info of a team if read from the text layer, passed through the following stages
+                    <tuple> (printed IMG, None) of the PDF otherwise
+                            (None, cropped IMGs) if printed by self.pdf_to_cropped_imgs()
+        """
+        if self.use_text_layer:
+            res_info = self.translate_text_layer(filestream=content, team_number=team_id)
+            if res_info is not None:
+                return res_info
+        if self.locate_zoom:  # region-aware printing, already cropped
+            return None, self.pdf_to_cropped_imgs(pdf_stream=content, fs_team_id=team_id)
+        return self.pdf_to_image(pdf_stream=content, fs_team_id=team_id), None
+
+    def _pipeline_crop(self, team_id, imgs):
+        """
+        "crop" stage of self.online_parser_pipeline()
+        :return:    <dict> info of a team if read from the text layer
+                    <tuple> (printed IMG, cropped IMGs) of the PDF otherwise
+        """
+        if isinstance(imgs, dict) or imgs[1] is not None:  # text layer read, or already cropped
+            return imgs
+        return imgs[0], self.crop_img(imgs[0])
+
+    def _pipeline_ocr(self, team_id, imgs):
+        """
+        "ocr" stage of self.online_parser_pipeline()
+        :return:    <dict> info of a team
+        """
+        if isinstance(imgs, dict):  # text layer read
+            return imgs
+        return self.ocr_cropped_imgs(imgs[0], imgs[1], team_id)
+
+
+class _WorkerParser(PrizeParser):
+    """
+    light-weight parser in a worker process, sharing the settings of the main parser
+    it owns no workspace, report or cache files, whose clean-ups are left to the main parser
+    """
+    def __init__(self, settings):
+        self.__dict__.update(settings)
+        self.logger = logging.getLogger("PrizeParser.worker")  # errors are logged by the main parser
+        self.logger.propagate = False
+        self.templates, self.templates_shape, self.templates_masks = self.initiate_templates()
+        self.locate_templates = self.initiate_locate_templates()
+        self.coarse_templates = self.initiate_locate_templates(self.render_zoom / self._PYRAMID_SCALE)
+        self.layout_cache = self.initiate_layout_cache()  # per worker
+        zoom_x, zoom_y, rotation_angle = self._pdf_img_trans_param
+        self.pdf_img_trans = fitz.Matrix(zoom_x, zoom_y).preRotate(rotation_angle)
+        self.ocr_engine = self.initiate_ocr_engine()  # loaded once per worker
+        self.profiler = self.initiate_profiler()  # popped with each result, merged by the main parser
+
+    def __del__(self):
+        pass
+
+
+_worker_parser = None  # <_WorkerParser> of a worker process
+
+
+def _init_worker(settings):
+    global _worker_parser
+    _worker_parser = _WorkerParser(settings)
+
+
+def _translate_in_worker(args):
+    """
+    :param args:    <tuple> (filename, filestream, fs_team_id), as in PrizeParser.translate_pdf()
+    :return:        <tuple> (<dict> info of a team, None, <dict> timings, <dict> counts) on success,
+                            (None, <str> error message, <dict> timings, <dict> counts) on errors
+                    timings as returned by StageProfiler.pop(), None if not profiled
+                    counts (hits and misses of the caches) as returned by PrizeParser.pop_cache_counts()
+    """
+    filename, filestream, fs_team_id = args
+    try:
+        info, err = _worker_parser.translate_pdf(filename=filename, filestream=filestream, fs_team_id=fs_team_id), None
+    except Exception as _err:
+        info, err = None, str(_err)
+    return (info, err, _worker_parser.profiler.pop() if _worker_parser.profiler is not None else None,
+            _worker_parser.pop_cache_counts())
+
 
 class ParserErrors(Exception):
     def __init__(self):
@@ -773,5 +1756,12 @@ if __name__ == "__main__":
     # Logger = create_logger(os.path.join(PATH, "log"), less_log=True)
     # pt = PrizeParser(PATH, logger=Logger, **kwargs)
     # pt.online_parser(range(2000000, 2099999))
+
+    # # Online Parser, on Discovered Teams Only
+    # from Discoverer import discover_teams, load_seed_teams
+    # Logger = create_logger(os.path.join(PATH, "log"), less_log=True)
+    # pt = PrizeParser(PATH, logger=Logger, **kwargs)
+    # seed = load_seed_teams(os.path.join(PATH, "2019 results.json"), offset=100000)
+    # pt.online_parser(discover_teams(2000000, 2099999, "http://comap-math.com/mcm/2020Certs/%d.pdf", seed_teams=seed))
     
     print("Welcome to MCM/ICM Parser. Please edit annotations to start executions.")
\ No newline at end of file
@@ -0,0 +1,136 @@
+import time
+import queue
+import threading
+
+_DONE = object()  # end of the stream of tasks
+
+
+class Stage(object):
+    def __init__(self, name, func, workers=1):
+        """
+        :param name:        <str> name of the stage, used in the report
+        :param func:        <function> (item, value) => value of the next stage, errors raised fail the item
+                            "item" is the original input, "value" is the output of the previous stage
+        :param workers:     <int> number of threads of the stage
+        """
+        self.name = name
+        self.func = func
+        self.workers = workers
+
+        # statistics
+        self.cnt, self.err_cnt, self.busy = 0, 0, 0.
+        self.first_start, self.last_end = None, None
+        self._lock = threading.Lock()
+
+    def record(self, start, end, failed):
+        with self._lock:
+            self.cnt += 1
+            self.err_cnt += int(failed)
+            self.busy += end - start
+            self.first_start = start if self.first_start is None else min(self.first_start, start)
+            self.last_end = end if self.last_end is None else max(self.last_end, end)
+
+    def stats(self):
+        """
+        :return:    <dict> {"items": <int>, "errors": <int>, "busy seconds": <float>,
+                                "throughput": <float> items per second (during the active period of the stage),
+                                "utilization": <float> busy ratio of the threads}
+        """
+        wall = (self.last_end - self.first_start) if self.cnt else 0.
+        return {"items": self.cnt, "errors": self.err_cnt, "busy seconds": self.busy,
+                "throughput": self.cnt / wall if wall else 0.,
+                "utilization": self.busy / (wall * self.workers) if wall else 0.}
+
+
+class Pipeline(object):
+    def __init__(self, stages, queue_size=4, max_in_flight=None):
+        """
+        stages run in their own threads, connected by bounded queues (a full queue blocks the upstream stage)
+        :param stages:          <list> of <Stage>
+        :param queue_size:      <int> capacity of the queue before each stage
+        :param max_in_flight:   <int> max items fed but not yet yielded (including those waiting to be re-ordered)
+                                None (default) for the capacity of all the queues and threads
+        """
+        self.stages = stages
+        self.queue_size = queue_size
+        self.max_in_flight = max_in_flight if max_in_flight is not None else \
+            sum(_stage.workers + queue_size for _stage in stages)
+        self._stop = threading.Event()
+
+    def stop(self):
+        """
+        stop feeding new items, items already fed are still yielded
+        """
+        self._stop.set()
+
+    def _feed(self, items, q_out, in_flight):
+        for seq, item in enumerate(items):
+            in_flight.acquire()
+            if self._stop.is_set():
+                break
+            q_out.put((seq, item, item, None, None))
+        q_out.put(_DONE)
+
+    @staticmethod
+    def _work(stage, q_in, q_out, remaining, lock):
+        while True:
+            task = q_in.get()
+            if task is _DONE:
+                q_in.put(_DONE)  # for the sibling threads
+                with lock:
+                    remaining[0] -= 1
+                    if 0 == remaining[0]:
+                        q_out.put(_DONE)
+                return
+
+            seq, item, value, err, failed_stage = task
+            if err is None:  # failed items pass through
+                start = time.time()
+                try:
+                    value = stage.func(item, value)
+                except Exception as _err:
+                    err, failed_stage = _err, stage.name
+                stage.record(start, time.time(), err is not None)
+            q_out.put((seq, item, value, err, failed_stage))
+
+    def run(self, items):
+        """
+        :param items:   <iterable> of inputs
+        :return:        <generator> of (item, <*> output of the last stage, <Exception> error, <str> failed stage)
+                        in the order of "items", error and failed stage are None on success
+        """
+        queues = [queue.Queue(maxsize=self.queue_size) for _ in self.stages] + [queue.Queue()]
+        in_flight = threading.Semaphore(self.max_in_flight)
+        threads = [threading.Thread(target=self._feed, args=(items, queues[0], in_flight), daemon=True)]
+        for idx, stage in enumerate(self.stages):
+            remaining, lock = [stage.workers], threading.Lock()
+            threads.extend(threading.Thread(target=self._work, daemon=True,
+                                            args=(stage, queues[idx], queues[idx + 1], remaining, lock))
+                           for _ in range(stage.workers))
+        for thread in threads:
+            thread.start()
+
+        # re-order the outputs
+        buffer, next_seq = {}, 0
+        while True:
+            task = queues[-1].get()
+            if task is _DONE:
+                break
+            buffer[task[0]] = task
+            while next_seq in buffer:
+                _, item, value, err, failed_stage = buffer.pop(next_seq)
+                next_seq += 1
+                in_flight.release()
+                yield item, value, err, failed_stage
+
+    def report(self):
+        """
+        :return:    <str> statistics of each stage
+        """
+        out_str = ""
+        for stage in self.stages:
+            st = stage.stats()
+            out_str += "\t%-8s x%d\t%d items (%d errors)\t%.2f items/s\tbusy %.2fs (%.1f%%)\n" \
+                       % (stage.name, stage.workers, st["items"], st["errors"],
+                          st["throughput"], st["busy seconds"], st["utilization"] * 100.)
+        return out_str
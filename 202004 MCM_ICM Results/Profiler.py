@@ -0,0 +1,120 @@
+import math
+import time
+import json
+import functools
+import threading
+
+_BUCKETS_PER_OCTAVE = 8  # resolution of the histograms, buckets of about 9% wide
+
+
+class StageProfiler(object):
+    """
+    latency histograms of the stages (e.g. methods of PrizeParser), bucketed logarithmically in microseconds:
+        count, total and max are exact, percentiles are the upper bounds of the buckets (clipped to max)
+    histograms of several profilers (e.g. of worker processes) are merged by self.merge()
+    shared by the threads of a process
+    """
+
+    def __init__(self):
+        self.hists = {}  # {<str> stage: {"count": <int>, "total": <float>, "max": <float>, "buckets": <dict>}}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _bucket(seconds):
+        return max(0, int(math.log2(max(seconds * 1e6, 1.)) * _BUCKETS_PER_OCTAVE))
+
+    def record(self, stage, seconds):
+        """
+        :param stage:       <str> name of the stage
+        :param seconds:     <float> time elapsed
+        """
+        bucket = self._bucket(seconds)
+        with self._lock:
+            hist = self.hists.setdefault(stage, {"count": 0, "total": 0., "max": 0., "buckets": {}})
+            hist["count"] += 1
+            hist["total"] += seconds
+            hist["max"] = max(hist["max"], seconds)
+            hist["buckets"][bucket] = hist["buckets"].get(bucket, 0) + 1
+
+    def call(self, stage, func, *args, **kwargs):
+        """
+        :return:    return of func(*args, **kwargs), timed as "stage" (even if errors raised)
+        """
+        start = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            self.record(stage, time.perf_counter() - start)
+
+    def wrap(self, stage, func):
+        """
+        :return:    <function> func timed as "stage"
+        """
+        @functools.wraps(func)
+        def _timed(*args, **kwargs):
+            return self.call(stage, func, *args, **kwargs)
+        return _timed
+
+    def pop(self):
+        """
+        :return:    <dict> histograms recorded since the last pop, to be merged into another profiler
+        """
+        with self._lock:
+            hists, self.hists = self.hists, {}
+        return hists
+
+    def merge(self, hists):
+        """
+        :param hists:   <dict> histograms, as returned by self.pop()
+        """
+        with self._lock:
+            for stage, src in hists.items():
+                hist = self.hists.setdefault(stage, {"count": 0, "total": 0., "max": 0., "buckets": {}})
+                hist["count"] += src["count"]
+                hist["total"] += src["total"]
+                hist["max"] = max(hist["max"], src["max"])
+                for bucket, cnt in src["buckets"].items():
+                    hist["buckets"][bucket] = hist["buckets"].get(bucket, 0) + cnt
+
+    @staticmethod
+    def _percentile(hist, q):
+        rank = q * hist["count"]
+        seen = 0
+        for bucket in sorted(hist["buckets"]):
+            seen += hist["buckets"][bucket]
+            if seen >= rank:
+                return min(2 ** ((bucket + 1) / _BUCKETS_PER_OCTAVE) / 1e6, hist["max"])
+        return hist["max"]
+
+    def stats(self):
+        """
+        :return:    <dict> {<str> stage: {"count": <int>, "total": <float>, "mean": <float>,
+                                            "p50": <float>, "p95": <float>, "max": <float>}}, in seconds,
+                    sorted by total time, descending
+        """
+        with self._lock:
+            hists = {stage: dict(hist, buckets=dict(hist["buckets"])) for stage, hist in self.hists.items()}
+        return {stage: {"count": hist["count"], "total": hist["total"], "mean": hist["total"] / hist["count"],
+                        "p50": self._percentile(hist, .5), "p95": self._percentile(hist, .95), "max": hist["max"]}
+                for stage, hist in sorted(hists.items(), key=lambda _h: -_h[1]["total"])}
+
+    def report(self):
+        """
+        :return:    <str> statistics of the stages, one stage per line
+        """
+        return "".join("\t%-24s\t%d calls\ttotal %.1fs\tp50 %.1fms\tp95 %.1fms\tmax %.1fms\n"
+                       % (stage, _s["count"], _s["total"], _s["p50"] * 1000., _s["p95"] * 1000., _s["max"] * 1000.)
+                       for stage, _s in self.stats().items())
+
+    def dump(self, json_path):
+        """
+        :param json_path:   <str> path of the metrics JSON, {"stages": self.stats(), "histograms": ...}
+                            histograms as {<str> stage: {<str> upper bound of the bucket in seconds: <int> count}}
+        """
+        stats = self.stats()
+        with self._lock:
+            hists = {stage: {"%.6g" % (2 ** ((bucket + 1) / _BUCKETS_PER_OCTAVE) / 1e6): cnt
+                             for bucket, cnt in sorted(self.hists[stage]["buckets"].items())}
+                     for stage in stats}
+        with open(json_path, "w") as f:
+            json.dump({"stages": stats, "histograms": hists}, f, indent=4)
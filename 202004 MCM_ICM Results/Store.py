@@ -0,0 +1,236 @@
+import os
+import json
+import zlib
+import sqlite3
+import hashlib
+import threading
+
+FIELDS = ["teams counts", "teams numbers",
+          "student1", "student2", "student3",
+          "advisor_type", "advisor", "school", "prize"]
+
+
+class ResultStore(object):
+    """
+    append-only JSON Lines file of the info of teams, one team per line
+        appends are flushed at once and fsync-ed every "sync_interval" appends
+        a team appended more than once is de-duplicated by "team_number" (the last one kept)
+        a line torn by a crash is dropped when the store is re-opened
+    """
+
+    def __init__(self, filename, sync_interval=100):
+        """
+        :param filename:        <str> path of the JSON Lines file, created if non-existent
+        :param sync_interval:   <int> number of appends between two fsync
+        """
+        self.filename = filename
+        self.sync_interval = sync_interval
+        self._unsynced = 0
+        self._truncate_torn_line()
+        self.file = open(filename, "a", encoding="utf8")
+
+    def _truncate_torn_line(self):
+        if not os.path.exists(self.filename):
+            return
+        with open(self.filename, "rb+") as f:
+            f.seek(0, os.SEEK_END)
+            size = f.tell()
+            if 0 == size:
+                return
+            f.seek(size - 1)
+            if b"\n" == f.read(1):
+                return
+            # find the end of the last complete line
+            pos = size
+            while pos > 0:
+                step = min(4096, pos)
+                f.seek(pos - step)
+                chunk = f.read(step)
+                idx = chunk.rfind(b"\n")
+                if -1 != idx:
+                    pos = pos - step + idx + 1
+                    break
+                pos -= step
+            f.truncate(pos)
+
+    def append(self, info):
+        """
+        :param info:    <dict> info of a team, with key "team_number"
+        :return:        <int> length of the written line
+        """
+        line = json.dumps(info) + "\n"
+        wl = self.file.write(line)
+        self.file.flush()
+        self._unsynced += 1
+        if self._unsynced >= self.sync_interval:
+            self.sync()
+        return wl
+
+    def sync(self):
+        self.file.flush()
+        os.fsync(self.file.fileno())
+        self._unsynced = 0
+
+    def close(self):
+        if self.file.closed:
+            return
+        self.sync()
+        self.file.close()
+
+    def _offsets(self):
+        """
+        :return:    <dict> {<int> team number: <int> offset of its last line}, in the order of the first appends
+        """
+        self.file.flush()
+        offsets = {}
+        with open(self.filename, "rb") as f:
+            offset = 0
+            for line in f:
+                try:
+                    offsets[json.loads(line)["team_number"]] = offset
+                except (ValueError, KeyError, TypeError):  # torn or invalid line
+                    pass
+                offset += len(line)
+        return offsets
+
+    def team_numbers(self):
+        """
+        :return:    <list> of team numbers stored
+        """
+        return list(self._offsets().keys())
+
+    def iter_results(self, offsets=None):
+        """
+        :param offsets: <dict> as returned by self._offsets(), None to scan the file
+        :return:        <generator> of <dict> info of the teams, de-duplicated, read one by one from the file
+        """
+        offsets = self._offsets() if offsets is None else offsets
+        with open(self.filename, "rb") as f:
+            for offset in offsets.values():
+                f.seek(offset)
+                yield json.loads(f.readline())
+
+    def export_json(self, json_path):
+        """
+        stream the results to a JSON file, formatted as json.dump(indent=4) of
+            {"fields": FIELDS, "teams counts": <int>, "teams numbers": <list>, "info": <list> of <dict>}
+        :param json_path:   <str> path of the output JSON
+        :return:            <int> number of teams exported
+        """
+        offsets = self._offsets()
+        team_numbers = list(offsets.keys())
+
+        def _list(items, indent):
+            if not items:
+                return "[]"
+            return "[\n%s\n%s]" % (",\n".join(" " * (indent + 4) + item for item in items), " " * indent)
+
+        with open(json_path, "w") as f:
+            f.write("{\n    \"fields\": %s,\n" % _list([json.dumps(_f) for _f in FIELDS], 4))
+            f.write("    \"teams counts\": %d,\n" % len(team_numbers))
+            f.write("    \"teams numbers\": %s,\n" % _list([json.dumps(_t) for _t in team_numbers], 4))
+            if not team_numbers:
+                f.write("    \"info\": []\n}")
+                return 0
+            f.write("    \"info\": [\n")
+            for idx, info in enumerate(self.iter_results(offsets)):
+                if idx:
+                    f.write(",\n")
+                f.write("\n".join(" " * 8 + line for line in json.dumps(info, indent=4).split("\n")))
+            f.write("\n    ]\n}")
+        return len(team_numbers)
+
+
+class PackStore(object):
+    """
+    compressed, de-duplicated store of files (e.g. PDFs of teams) kept in a single pack file:
+        "<filename>.pack"   zlib-compressed blobs, appended one after another
+        "<filename>.idx"    SQLite index, blobs (digest => offset, size) and keys (<int> key => digest)
+    identical files are stored once, a blob appended but not indexed (e.g. interrupted) is truncated on re-opening
+    shared by the threads of a process
+    """
+
+    def __init__(self, filename, level=6):
+        """
+        :param filename:    <str> path of the store, without extension
+        :param level:       <int> zlib compression level
+        """
+        self.filename = filename
+        self.level = level
+        self.hits, self.misses = 0, 0
+        self._lock = threading.Lock()
+
+        self.conn = sqlite3.connect(filename + ".idx", check_same_thread=False)
+        self.conn.execute("CREATE TABLE IF NOT EXISTS blobs "
+                          "(digest TEXT PRIMARY KEY, offset INTEGER, size INTEGER, raw_size INTEGER)")
+        self.conn.execute("CREATE TABLE IF NOT EXISTS keys (key INTEGER PRIMARY KEY, digest TEXT)")
+        self.conn.commit()
+        end = self.conn.execute("SELECT MAX(offset + size) FROM blobs").fetchone()[0] or 0
+        self.pack = open(filename + ".pack", "a+b")
+        self.pack.truncate(end)  # drop the blob not indexed
+
+    def get(self, key):
+        """
+        :param key:     <int> key, e.g. team number
+        :return:        <bytes> data of the file, None if not stored
+        """
+        with self._lock:
+            row = self.conn.execute("SELECT blobs.offset, blobs.size FROM keys JOIN blobs USING (digest) "
+                                    "WHERE keys.key = ?", (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self.pack.seek(row[0])
+            data = self.pack.read(row[1])
+        return zlib.decompress(data)
+
+    def put(self, key, data):
+        """
+        :param key:     <int> key, e.g. team number
+        :param data:    <bytes> data of the file
+        """
+        digest = hashlib.sha1(data).hexdigest()
+        with self._lock:
+            exists = self.conn.execute("SELECT 1 FROM blobs WHERE digest = ?", (digest,)).fetchone()
+        compressed = None if exists else zlib.compress(data, self.level)
+        with self._lock:
+            if compressed is not None and \
+                    not self.conn.execute("SELECT 1 FROM blobs WHERE digest = ?", (digest,)).fetchone():
+                self.pack.seek(0, os.SEEK_END)
+                offset = self.pack.tell()
+                self.pack.write(compressed)
+                self.pack.flush()  # written before indexed
+                self.conn.execute("INSERT INTO blobs VALUES (?, ?, ?, ?)", (digest, offset, len(compressed), len(data)))
+            self.conn.execute("INSERT OR REPLACE INTO keys VALUES (?, ?)", (key, digest))
+            self.conn.commit()
+
+    def keys(self):
+        """
+        :return:    <list> of <int> keys stored, sorted
+        """
+        with self._lock:
+            return [_key for (_key,) in self.conn.execute("SELECT key FROM keys ORDER BY key")]
+
+    def __contains__(self, key):
+        with self._lock:
+            return self.conn.execute("SELECT 1 FROM keys WHERE key = ?", (key,)).fetchone() is not None
+
+    def report(self):
+        """
+        :return:    <str> hits, misses and sizes of the store
+        """
+        with self._lock:
+            keys_cnt = self.conn.execute("SELECT COUNT(*) FROM keys").fetchone()[0]
+            blobs_cnt, size, raw_size = self.conn.execute(
+                "SELECT COUNT(*), TOTAL(size), TOTAL(raw_size) FROM blobs").fetchone()
+        return "\t%d read from the store, %d not stored\n" \
+               "\t%d files (%d unique), %.2fMB packed (%.2fMB raw)\n" \
+               % (self.hits, self.misses, keys_cnt, blobs_cnt, size / 2 ** 20, raw_size / 2 ** 20)
+
+    def close(self):
+        with self._lock:
+            if self.pack.closed:
+                return
+            self.pack.close()
+            self.conn.close()
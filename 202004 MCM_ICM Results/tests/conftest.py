@@ -0,0 +1,80 @@
+import os
+import sys
+import gc
+import time
+import logging
+import pytest
+import fitz
+
+TESTS_PATH = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.join(TESTS_PATH, ".."))  # modules of the parser
+from Parser import PrizeParser
+
+if hasattr(fitz, "restore_aliases"):  # camelCase API of the older PyMuPDF, used by the parser
+    fitz.restore_aliases()
+
+# certificates of the layout of the templates, written by Benchmark.synthetic_certificate():
+#   2000000 - 2000004   (2000000 and 2000004 without "With * Advisor")
+#   2000005 - 2000007   of an older synthetic layout, "Of" in 14pt (also matched by the "Of" of the first line)
+FIXTURES_PATH = os.path.join(TESTS_PATH, "fixtures")
+FIXTURES = sorted(_f for _f in os.listdir(FIXTURES_PATH) if _f.endswith(".pdf"))
+LAYOUT_FIXTURES = FIXTURES[:5]  # of the layout of the templates only
+TEMPLATES_PATH = os.path.join(TESTS_PATH, "..", "MCM_ICM", "templates")
+
+
+def read_certificates(filenames=FIXTURES):
+    """
+    :return:    <list> of <bytes> data of the PDF of each fixture of "filenames", in order
+    """
+    certificates = []
+    for filename in filenames:
+        with open(os.path.join(FIXTURES_PATH, filename), "rb") as f:
+            certificates.append(f.read())
+    return certificates
+
+
+def pytest_generate_tests(metafunc):
+    # tests taking "certificate" are run on each fixture
+    if "certificate" in metafunc.fixturenames:
+        metafunc.parametrize("certificate", read_certificates(), ids=FIXTURES)
+    # tests taking "layout_certificate" are run on each fixture of the layout of the templates
+    if "layout_certificate" in metafunc.fixturenames:
+        metafunc.parametrize("layout_certificate", read_certificates(LAYOUT_FIXTURES), ids=LAYOUT_FIXTURES)
+
+
+@pytest.fixture
+def certificates():
+    """
+    :return:    <list> of <bytes> data of the PDF of all the fixtures, for the tests on a sequence of pages
+    """
+    return read_certificates()
+
+
+@pytest.fixture
+def make_parser(tmp_path):
+    """
+    :return:    <function> **kwargs => <PrizeParser> working in a temporary root, with the templates of MCM_ICM,
+                a new parser replaces (deletes) the previous one of the test, in the same root
+                (e.g. to resume from its result store), a second later (the cache folder is named by the second)
+    """
+    workspace = os.getcwd()
+    parsers = []
+    logger = logging.getLogger("PrizeParser.tests")
+    logger.propagate = False
+    root = tmp_path / "root"
+    (root / "files").mkdir(parents=True)
+
+    def _make_parser(**kwargs):
+        if parsers:
+            del parsers[:]
+            gc.collect()
+            os.chdir(workspace)
+            time.sleep(1)
+        parsers.append(PrizeParser(str(root), templates_path=os.path.abspath(TEMPLATES_PATH), logger=logger,
+                                   **kwargs))
+        return parsers[0]
+
+    yield _make_parser
+    del parsers[:]
+    gc.collect()
+    os.chdir(workspace)
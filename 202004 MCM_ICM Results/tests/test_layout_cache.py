@@ -0,0 +1,31 @@
+
+def test_cache_as_full(make_parser, certificates):
+    """
+    the locations of a page of a cached layout are those of the full-page search, for every template
+    """
+    parser = make_parser(layout_cache_size=8)
+    for certificate in certificates:
+        img = parser.load_page_img(parser.pdf_to_image(pdf_stream=certificate, fs_team_id=0))
+        max_fits = parser.locate_full(img)
+        located = parser.layout_cache.lookup(img)
+        if located is None:
+            parser.layout_cache.add(max_fits)
+        else:
+            assert located == max_fits
+    assert parser.layout_cache.hits
+
+
+def test_report_merged(make_parser, certificates):
+    """
+    the report of a cache with the counts of another one (e.g. of a worker process) merged gives the total counts only
+    """
+    parser = make_parser(layout_cache_size=8)
+    worker_cache = parser.initiate_layout_cache()
+    for certificate in certificates[:3]:
+        img = parser.load_page_img(parser.pdf_to_image(pdf_stream=certificate, fs_team_id=0))
+        if worker_cache.lookup(img) is None:
+            worker_cache.add(parser.locate_full(img))
+    parser.layout_cache.merge_counts(worker_cache.pop_counts())
+    assert (0, 0) == worker_cache.pop_counts()
+    assert parser.layout_cache.report() == worker_cache.report()
+    assert "1 hits, 2 misses" in parser.layout_cache.report()
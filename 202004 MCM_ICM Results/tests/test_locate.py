@@ -0,0 +1,7 @@
+def test_coarse_to_fine_as_full(make_parser, certificate):
+    """
+    coarse-to-fine locating gives the best fit locations of the full-page search, for every template
+    """
+    parser = make_parser(layout_cache_size=0)
+    img = parser.load_page_img(parser.pdf_to_image(pdf_stream=certificate, fs_team_id=0))
+    assert parser.locate_coarse_to_fine(img) == parser.locate_full(img)
@@ -0,0 +1,31 @@
+import numpy as np
+from Ocr import CachedEngine
+
+
+class CountingEngine(object):
+    name = "counting"
+
+    def __init__(self):
+        self.calls = 0
+
+    def image_to_string(self, img):
+        self.calls += 1
+        return "text %d" % self.calls
+
+
+def test_cached_engine(tmp_path):
+    """
+    the same inked part is OCRed once, even at another offset, and the counts merged are reported with the texts
+    """
+    img = np.full((40, 60), 255, dtype=np.uint8)
+    img[10:20, 10:30] = 0
+    shifted = np.roll(img, (5, 5), axis=(0, 1))
+    engine = CountingEngine()
+    cache = CachedEngine(engine, str(tmp_path / "ocr.sqlite"))
+    assert cache.image_to_string(img) == cache.image_to_string(shifted) == "text 1"
+    assert 1 == engine.calls
+
+    worker_cache = CachedEngine(engine, str(tmp_path / "ocr.sqlite"))  # as in a worker process
+    assert "text 1" == worker_cache.image_to_string(img)
+    cache.merge_counts(worker_cache.pop_counts())
+    assert "\t2 hits, 1 misses (66.67% hit rate), 1 texts cached\n" == cache.report()
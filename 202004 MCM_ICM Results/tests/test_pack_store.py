@@ -0,0 +1,46 @@
+import os
+from Store import PackStore
+
+
+def test_pack_store_round_trip(tmp_path):
+    """
+    files are read back as put, kept across re-opening, and identical files are packed once
+    """
+    filename = str(tmp_path / "pdfs")
+    store = PackStore(filename)
+    assert store.get(2000000) is None
+    store.put(2000000, b"%PDF certificate 0" * 100)
+    store.put(2000001, b"%PDF certificate 1" * 100)
+    store.put(2000002, b"%PDF certificate 0" * 100)  # same file
+    store.put(2000001, b"%PDF certificate 1" * 100)  # put again
+    size = os.path.getsize(filename + ".pack")
+    store.close()
+
+    store = PackStore(filename)
+    assert [2000000, 2000001, 2000002] == store.keys()
+    assert 2000002 in store and 2000003 not in store
+    assert store.get(2000000) == store.get(2000002) == b"%PDF certificate 0" * 100
+    assert store.get(2000001) == b"%PDF certificate 1" * 100
+    assert 2 == store.conn.execute("SELECT COUNT(*) FROM blobs").fetchone()[0]
+    assert size == os.path.getsize(filename + ".pack")
+    store.close()
+
+
+def test_pack_store_unindexed_tail(tmp_path):
+    """
+    a blob appended to the pack but not indexed (interrupted) is truncated on re-opening, and the pack is usable
+    """
+    filename = str(tmp_path / "pdfs")
+    store = PackStore(filename)
+    store.put(2000000, b"%PDF certificate 0")
+    size = os.path.getsize(filename + ".pack")
+    store.close()
+    with open(filename + ".pack", "ab") as f:
+        f.write(b"\x78\x9c half of a compressed blob")
+
+    store = PackStore(filename)
+    assert size == os.path.getsize(filename + ".pack")
+    store.put(2000001, b"%PDF certificate 1")
+    assert store.get(2000000) == b"%PDF certificate 0"
+    assert store.get(2000001) == b"%PDF certificate 1"
+    store.close()
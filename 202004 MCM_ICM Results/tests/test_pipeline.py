@@ -0,0 +1,54 @@
+import itertools
+import threading
+import time
+from Pipeline import Stage, Pipeline
+
+
+def test_order():
+    """
+    outputs are yielded in the order of the inputs, though later items finish first in a stage of several threads
+    """
+    stages = [Stage("slow", lambda item, value: time.sleep(0.01 * (10 - item)) or value * 2, workers=4),
+              Stage("add", lambda item, value: value + 1, workers=2)]
+    results = list(Pipeline(stages, queue_size=2).run(range(10)))
+    assert [(_item, _item * 2 + 1, None, None) for _item in range(10)] == results
+    assert [10, 10] == [_stage.stats()["items"] for _stage in stages]
+
+
+def test_failed_stage():
+    """
+    an item failed in a stage is yielded with its error and the name of the stage, and skipped by the next stages
+    """
+    def _check(item, value):
+        if 3 == item:
+            raise ValueError("invalid %d" % item)
+        return value
+
+    stages = [Stage("check", _check, workers=2), Stage("square", lambda item, value: value ** 2)]
+    results = list(Pipeline(stages).run(range(6)))
+    assert [_item for _item, _, _, _ in results] == list(range(6))
+    item, value, err, failed_stage = results[3]
+    assert (3, "check", "invalid 3") == (value, failed_stage, str(err))
+    assert all(_err is None and _value == _item ** 2 for _item, _value, _err, _ in results if 3 != _item)
+    assert (1, 5) == (stages[0].stats()["errors"], stages[1].stats()["items"])
+
+
+def test_stop():
+    """
+    stop() ends an endless input, the items already fed are still yielded, without hanging
+    """
+    pipeline = Pipeline([Stage("id", lambda item, value: value, workers=3)], queue_size=2, max_in_flight=4)
+    results = []
+
+    def _consume():
+        for item, _, _, _ in pipeline.run(itertools.count()):
+            results.append(item)
+            if 10 == item:
+                pipeline.stop()
+
+    consumer = threading.Thread(target=_consume, daemon=True)
+    consumer.start()
+    consumer.join(timeout=5)
+    assert not consumer.is_alive()
+    assert results == list(range(len(results)))
+    assert 10 < len(results) <= 11 + 4
@@ -0,0 +1,37 @@
+import math
+import pytest
+
+
+@pytest.mark.parametrize("locate_zoom", [1, 2])
+def test_region_as_full(make_parser, layout_certificate, locate_zoom):
+    """
+    region-aware printing gives the boundaries of the full-page search at self.render_zoom (up to the error of the
+    locations scaled from self.locate_zoom), and crops the same categories, with or without "With * Advisor"
+    """
+    parser = make_parser(layout_cache_size=0, locate_zoom=locate_zoom)
+    error = math.ceil(parser.render_zoom / locate_zoom)
+    img = parser.load_page_img(parser.pdf_to_image(pdf_stream=layout_certificate, fs_team_id=0))
+    _X, _Y = parser.calc_boundaries(parser.check_advisor(img, parser.templates, parser.locate_full(img)))
+    full_imgs = parser.crop_img(img.copy())
+
+    pdf = parser.pdf_obj_stream(layout_certificate)
+    _X_region, _Y_region = parser.locate_boundaries(pdf[0])
+    pdf.close()
+    region_imgs = parser.pdf_to_cropped_imgs(pdf_stream=layout_certificate, fs_team_id=0)
+
+    assert _X_region == _X
+    for category, boundaries in _Y.items():
+        if boundaries is None:
+            assert _Y_region[category] is None and region_imgs[category] is None and full_imgs[category] is None
+            continue
+        assert all(abs(_y - _y_region) <= error for _y, _y_region in zip(boundaries, _Y_region[category]))
+        assert abs(region_imgs[category].shape[0] - full_imgs[category].shape[0]) <= error + 1
+
+
+def test_region_to_files(make_parser, layout_certificate):
+    """
+    region-aware printing without the stream image cache writes every category cropped
+    """
+    parser = make_parser(layout_cache_size=0, locate_zoom=2, cache_img_stream=False)
+    region_imgs = parser.pdf_to_cropped_imgs(pdf_stream=layout_certificate, fs_team_id=0)
+    assert all(_name is None or _name.startswith("0_") for _name in region_imgs.values())
@@ -0,0 +1,63 @@
+import json
+from Store import FIELDS, ResultStore
+
+INFOS = [{"team_number": 2000000, "student1": "Emma Zhang", "student2": "Sofia Johnson", "student3": None,
+          "advisor_type": None, "advisor": "", "school": "University of Washington",
+          "prize": "Successful Participant"},
+         {"team_number": 2000001, "student1": "Zhiyuan Lewis", "student2": None, "student3": None,
+          "advisor_type": "With Faculty Advisor", "advisor": "Carol Liu", "school": "Université de Montréal",
+          "prize": "Outstanding Winner"}]
+
+
+def expected_json(infos):
+    """
+    :return:    <str> results as dumped by the parser before the store, with json.dump(indent=4)
+    """
+    return json.dumps({"fields": FIELDS, "teams counts": len(infos),
+                       "teams numbers": [_info["team_number"] for _info in infos], "info": infos}, indent=4)
+
+
+def test_result_store_export(tmp_path):
+    """
+    the JSON exported is formatted as json.dump(indent=4) of the results, with or without teams
+    """
+    store = ResultStore(str(tmp_path / "result.jsonl"))
+    store.export_json(str(tmp_path / "empty.json"))
+    for info in INFOS:
+        store.append(info)
+    assert len(INFOS) == store.export_json(str(tmp_path / "result.json"))
+    store.close()
+    assert (tmp_path / "empty.json").read_text() == expected_json([])
+    assert (tmp_path / "result.json").read_text() == expected_json(INFOS)
+
+
+def test_result_store_dedup(tmp_path):
+    """
+    a team appended again (e.g. re-parsed after resuming) is kept once, the last one, in the order of the first
+    """
+    store = ResultStore(str(tmp_path / "result.jsonl"))
+    reparsed = dict(INFOS[0], prize="Meritorious Winner")
+    for info in INFOS + [reparsed]:
+        store.append(info)
+    assert [2000000, 2000001] == store.team_numbers()
+    assert [reparsed, INFOS[1]] == list(store.iter_results())
+    store.close()
+
+
+def test_result_store_torn_line(tmp_path):
+    """
+    a line torn by a crash is dropped when the store is re-opened, the lines appended after it are kept whole
+    """
+    filename = str(tmp_path / "result.jsonl")
+    store = ResultStore(filename)
+    store.append(INFOS[0])
+    store.close()
+    with open(filename, "a", encoding="utf8") as f:
+        f.write(json.dumps(INFOS[1])[:20])  # interrupted write
+    store = ResultStore(filename)
+    assert [2000000] == store.team_numbers()
+    store.append(INFOS[1])
+    assert INFOS == list(store.iter_results())
+    store.close()
+    with open(filename, encoding="utf8") as f:
+        assert [json.dumps(_info) for _info in INFOS] == f.read().splitlines()
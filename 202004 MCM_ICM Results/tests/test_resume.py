@@ -0,0 +1,58 @@
+import os
+import pytest
+from Parser import ParsingError
+from Store import ResultStore
+
+# handled in order: parsed, failed (not a PDF), parsed, interrupted, ...
+KEYS = ["2000000.pdf", "1999999.pdf", "2000001.pdf", "2000002.pdf", "2000003.pdf", "2000004.pdf"]
+
+
+def record_translated(parser, interrupt_at=None):
+    """
+    :return:    <list> of the filenames translated by "parser" from now on, KeyboardInterrupt raised at "interrupt_at"
+    """
+    translated = []
+    translate_pdf = parser.translate_pdf
+
+    def _translate_pdf(filename=None, filestream=None, fs_team_id=None):
+        if interrupt_at == filename:
+            raise KeyboardInterrupt
+        translated.append(filename)
+        return translate_pdf(filename=filename, filestream=filestream, fs_team_id=fs_team_id)
+
+    parser.translate_pdf = _translate_pdf
+    return translated
+
+
+def test_resume_without_store(make_parser):
+    with pytest.raises(ParsingError):
+        make_parser(resume=True)
+
+
+def test_resume(make_parser, certificates):
+    """
+    a run interrupted after some keys is resumed on the keys failed and the keys after the interruption only
+    """
+    kwargs = {"layout_cache_size": 0, "parallel_workers": 0, "result_store_file": "result.jsonl",
+              "checkpoint_interval": 1}
+    parser = make_parser(**kwargs)
+    for filename, certificate in zip(KEYS[:1] + KEYS[2:], certificates):
+        with open(os.path.join(parser.files_path, filename), "wb") as f:
+            f.write(certificate)
+    with open(os.path.join(parser.files_path, KEYS[1]), "wb") as f:
+        f.write(b"not a PDF")
+
+    translated = record_translated(parser, interrupt_at=KEYS[3])
+    with pytest.raises(KeyboardInterrupt):
+        parser.local_parser(KEYS)
+    assert translated == KEYS[:3]
+
+    parser = make_parser(resume=True, **kwargs)
+    translated = record_translated(parser)
+    parser.local_parser(KEYS)
+    assert translated == KEYS[1:2] + KEYS[3:]
+    assert parser.failed_list == KEYS[1:2]
+
+    store = ResultStore(os.path.join(parser.root, "result.jsonl"))
+    assert sorted(store.team_numbers()) == sorted(int(_key.split(".")[0]) for _key in KEYS[:1] + KEYS[2:])
+    store.close()
@@ -1,9 +1,6 @@
-import os, shutil, time
+import os, sys, shutil, time
 from datetime import datetime
 import re
-from bs4 import BeautifulSoup
-import urllib
-from urllib import request
 from urllib.parse import quote
 import string
 from lxml.html import fromstring
@@ -11,6 +8,9 @@ import html2text
 import numpy as np
 import pandas as pd
 from tqdm import tqdm
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))  # shared modules at repository root
+from Requester import Requester
+from Selector import parse_html, select, text
 
 ROOT = "https://zhiyuan.sjtu.edu.cn/"
 NAME_LIST_URL = "https://zhiyuan.sjtu.edu.cn/articles/625"
@@ -20,6 +20,7 @@ OUTPUT_DES_FOLDER = "致远学院学生名册 - " + TIME_STAMP  # e.g. 致远学
 SAVE_PAGE = False
 SLEEP_INTERVAL = 0.1  # seconds
 DEBUG_MODE = False  # True
+REQUESTER = Requester(timeout=10, max_retries=2)  # keep-alive connections to the source site
 
 
 def init():
@@ -64,20 +65,19 @@ def get_page_list():
     """
     if DEBUG_MODE:
         print("Fetching List of Name List Pages ...")
-    _page = urllib.request.urlopen(NAME_LIST_URL)
-    page = loose_decode(_page.read())
+    page = loose_decode(REQUESTER.get(NAME_LIST_URL))
     if DEBUG_MODE:
         print("\tRoot Read")
 
-    soup = BeautifulSoup(page, features="html.parser")
+    doc = parse_html(page)
 
-    nm_lst_refs = soup.select(".page-body > p > a")
+    nm_lst_refs = select(doc, ".page-body > p > a")
     if DEBUG_MODE:
         print("\tPage Parsed")
 
     page_list = []  # [<str>url, <str>major, <int>year]
     for a_a in nm_lst_refs:
-        _url = a_a["href"]
+        _url = a_a.attrib["href"]
         _url_sp = _url.split("/")
         _year = int(_url_sp[2])  # OR? a_a.string.split("级")[0]  # OR a_a.text...
         _major = _url_sp[3]
@@ -107,18 +107,18 @@ def fetch_single_info(q_id, major, year, _idx, _nm):
         status      0 if nothing to be added, -1 if to add, 1 if success
         temp        <list> of info. [name, description, profile_name]
     """
-    _info = _nm.select("td")
+    _info = select(_nm, "td")
     temp = []
     name, description, profile = None, None, None
 
     # fetching text: name, description
     try:
         _text = _info[1]
-        name = _text.select("h3")[0].text.strip()
+        name = text(select(_text, "h3")[0]).strip()
         try:
-            _description = _text.select("div > p")[0].text
+            _description = text(select(_text, "div > p")[0])
         except:
-            _description = _text.select("div")[0].text
+            _description = text(select(_text, "div")[0])
         # description = fromstring(_description).text_content() # <br> => ' '
         description = html2text.html2text(_description).strip()
         if not description:
@@ -134,9 +134,9 @@ def fetch_single_info(q_id, major, year, _idx, _nm):
     # fetching profile
     try:
         _profile = _info[0]
-        profile = url_relative_to_absolute(_profile.select("img")[0]["src"])
+        profile = url_relative_to_absolute(select(_profile, "img")[0].attrib["src"])
         filename = "%s %s #%d %s.jpg" % (major, year, _idx + 1, name)
-        download_local(page_read=urllib.request.urlopen(profile).read(),
+        download_local(page_read=REQUESTER.get(quote(profile, safe=string.printable)),
                        filename=filename, log=None)
         temp.append(filename)
     except Exception as e:
@@ -173,21 +173,20 @@ def fetch_stu_info(q_id, page_info):  # [<str>url, <str>major, <int>year]
     url = quote(url, safe=string.printable)
 
     # request and read page
-    _page = urllib.request.urlopen(url)
-    page = loose_decode(_page.read())
-    soup = BeautifulSoup(page, features="html.parser")
+    page = loose_decode(REQUESTER.get(url))
+    doc = parse_html(page)
 
     # save html page
     if SAVE_PAGE:
         download_local(page.encode(), "%s %d.html" % (major, year), "Name List Page")
 
     # get total number of students
-    _cnt = soup.select("ul.breadcrumb > li.active")[0]
-    count_text = _cnt.text
-    count = int(_cnt.text.split("共计")[1].split("人")[0].strip())
+    _cnt = select(doc, "ul.breadcrumb > li.active")[0]
+    count_text = text(_cnt)
+    count = int(text(_cnt).split("共计")[1].split("人")[0].strip())
 
     # get info details
-    _nm_lst = soup.select("table.table.table-hover tr")
+    _nm_lst = select(doc, "table.table.table-hover tr")
     _parsed_len = len(_nm_lst)
     if _parsed_len != count:
         print("\t[ERROR] Count Mismatch: %d out of %d" % (_parsed_len, count))
@@ -1,15 +1,29 @@
 import os
+import sys
 import shutil
 from datetime import datetime
 import logging
 import json
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed, wait, FIRST_COMPLETED
+from urllib.parse import urlsplit
 from logging.handlers import RotatingFileHandler
 from tqdm import tqdm
-import urllib.request
 import re
-from bs4 import BeautifulSoup
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))  # shared modules at repository root
+from Requester import Requester
+from Selector import parse_html, select, iter_matches, text
+
+try:  # optional, for the columnar results in Parquet
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:
+    pyarrow = None
 
 URL_ROOT = "http://gs.cyscc.org/"
+WORKERS = 8  # number of threads fetching name list pages concurrently, 1 for the plain serial crawl
+HOST_CONCURRENCY = 4  # max requests in flight to a single host (politeness limit), whatever WORKERS is
+REQUESTER = Requester(timeout=10, max_retries=2, pool_size=HOST_CONCURRENCY)  # keep-alive connections to the site
 
 # --- FILE_ROOT             <folder>    ** make sure path exists **
 #  |--- FILE_CACHE_PATH     <folder>    to be deleted when successfully terminated
@@ -24,11 +38,16 @@ FILE_DES_ROOT = "全国青少年科技竞赛获奖名单 - " + datetime.now().st
 FILE_DECL_NAME = "Declaration.txt"
 FILE_DES_CERT = "Sample Certificates/"
 FILE_RES_NAME = "Name List.json"
+FILE_RES_JSONL_NAME = "Name List.jsonl"
+FILE_RES_COLUMNAR_NAME = "Name List"  # + ".parquet" if pyarrow installed, else + " (Dictionary Encoded).json"
 FILE_LOG_NAME = "Log.txt"
 FILE_NL_SRC_NAME = "Name Lists Source.json"
 FILE_CACHE_PATH = "cache_" + datetime.now().strftime("%Y%m%d%H%S") + "/"
 
 TARGET_SAMPLE_CERT = True  # whether to crawl the sample certificates
+RES_JSONL = False  # whether to write the results also as JSON Lines, one item per line
+RES_COLUMNAR = False  # whether the caches and results are columnar, metadata of a name list stored once
+PARQUET_BATCH_SIZE = 65536  # rows per row group of the Parquet results, i.e. held in memory at a time
 LESS_CONSOLE_LOG = True  # whether to show less debug logs in console
 
 
@@ -40,6 +59,181 @@ def url_rel_to_abs(_url):
     return URL_ROOT + _url if _url else None
 
 
+LIST_FIELDS = ["Events Table Title", "Subject", "Event", "Name List", "Link", "Redirected Link"]  # shared by the rows
+CACHE_ROW_FIELDS = ["name", "school", "area", "prize"]  # fields of a row of the caches, besides LIST_FIELDS
+RES_ROW_FIELDS = ["Name", "School", "Area", "Prize"]  # fields of a row of the results, besides LIST_FIELDS
+
+_HOST_SEMAPHORES = {}  # {<str> host: <threading.BoundedSemaphore>}, see fetch()
+_HOST_SEMAPHORES_LOCK = threading.Lock()
+
+
+def fetch(_url):
+    """
+    :param _url:  <str> absolute url
+    :return:      <bytes> page, at most HOST_CONCURRENCY requests to the host of "_url" are in flight at a time
+    """
+    host = urlsplit(_url).netloc
+    with _HOST_SEMAPHORES_LOCK:
+        semaphore = _HOST_SEMAPHORES.setdefault(host, threading.BoundedSemaphore(HOST_CONCURRENCY))
+    with semaphore:
+        return REQUESTER.get(_url)
+
+
+def dump_json_atomically(obj, path):
+    """
+    write "obj" as json to a partial file first, then rename it to "path",
+    so that an interrupted write never leaves a truncated json behind
+    """
+    with open(path + ".part", "w", encoding="utf8") as f:
+        json.dump(obj=obj, fp=f, indent=4, ensure_ascii=False)
+    os.replace(path + ".part", path)
+
+
+def dump_json_stream(head, key, items, path):
+    """
+    write {**head, key: [*items]} as "json.dump(indent=4, ensure_ascii=False)" does, atomically (as
+    dump_json_atomically()), but with "items" written one by one as they are generated, never held as a whole
+    :param head:    <dict> items before "key"
+    :param key:     <str> key of the list, the last one
+    :param items:   <iterable> of json serializable items
+    :param path:    <str> path of the json
+    :return:        <int> number of items written
+    """
+    _head = json.dumps(head, indent=4, ensure_ascii=False)[:-2] + "," if head else "{"  # without the closing "\n}"
+    cnt = 0
+    with open(path + ".part", "w", encoding="utf8") as f:
+        f.write("%s\n    %s: [" % (_head, json.dumps(key, ensure_ascii=False)))
+        for item in items:
+            f.write(",\n" if cnt else "\n")
+            f.write("\n".join(" " * 8 + line for line in json.dumps(item, indent=4, ensure_ascii=False).split("\n")))
+            cnt += 1
+        f.write("\n    ]\n}" if cnt else "]\n}")
+    os.replace(path + ".part", path)
+    return cnt
+
+
+_SEPARATOR = re.compile(r"\s*,?\s*")  # between the objects of a json list, see iter_json_list()
+
+
+def iter_json_list(path, key, chunk_size=65536):
+    """
+    read the objects of the list "key" of a json (e.g. written by dump_json_stream()) one by one,
+    so that the memory is bounded by the size of an object instead of the whole file
+    :param path:        <str> path of the json, whose first occurrence of '"key": [' opens the list
+    :param key:         <str> key of the list, of objects, lists or strings (numbers may be cut by the chunks)
+    :param chunk_size:  <int> size of the chunks read
+    :return:            <generator> of the objects of the list, in order
+    """
+    decoder = json.JSONDecoder()
+    opening = "%s: [" % json.dumps(key, ensure_ascii=False)
+    with open(path, "r", encoding="utf8") as f:
+        buf, eof = "", False
+        while opening not in buf:
+            chunk = f.read(chunk_size)
+            if not chunk:
+                raise ValueError("List %s Not Found in %s" % (key, path))
+            buf = buf[-len(opening):] + chunk  # only the tail kept, in case the opening is cut
+        pos = buf.index(opening) + len(opening)
+        while True:
+            pos = _SEPARATOR.match(buf, pos).end()
+            if buf.startswith("]", pos):
+                return
+            try:
+                obj, pos = decoder.raw_decode(buf, pos)
+            except ValueError:  # object cut by the end of the chunk
+                if eof:
+                    raise
+                chunk = f.read(chunk_size)
+                eof = not chunk
+                buf, pos = buf[pos:] + chunk, 0
+                continue
+            yield obj
+
+
+def split_item(item, row_fields):
+    """
+    :param item:        <dict> item of the caches or of the results
+    :param row_fields:  <list> CACHE_ROW_FIELDS or RES_ROW_FIELDS
+    :return:            <tuple> (<tuple> metadata of the name list, as LIST_FIELDS, <list> values of "row_fields")
+    """
+    return tuple(item[_k] for _k in LIST_FIELDS), [item[_k] for _k in row_fields]
+
+
+def dump_dict_encoded(row_fields, rows, path):
+    """
+    write the rows dictionary-encoded, the metadata of each name list stored once and referred by index,
+    streamed as dump_json_stream() (only the metadata of the name lists kept in memory), one row per line:
+        {"Fields": [...], "Row Fields": ["List", *row_fields], "Rows": [[<int> index in "Lists", *values], ...],
+         "List Fields": LIST_FIELDS, "Lists": [[*metadata], ...]}
+    :param row_fields:  <list> CACHE_ROW_FIELDS or RES_ROW_FIELDS
+    :param rows:        <iterable> of rows, as returned by split_item()
+    :param path:        <str> path of the json
+    :return:            <int> number of rows written
+    """
+    lists = {}  # {<tuple> metadata: <int> index}
+    cnt = 0
+    with open(path + ".part", "w", encoding="utf8") as f:
+        f.write("{\n    \"Fields\": %s,\n    \"Row Fields\": %s,\n    \"Rows\": [" % (
+            json.dumps(["Fields", "Row Fields", "Rows", "List Fields", "Lists"]),
+            json.dumps(["List"] + row_fields, ensure_ascii=False)))
+        for metadata, values in rows:
+            idx = lists.setdefault(metadata, len(lists))
+            f.write(",\n        " if cnt else "\n        ")
+            f.write(json.dumps([idx] + values, ensure_ascii=False))
+            cnt += 1
+        f.write("\n    ],\n" if cnt else "],\n")
+        f.write("    \"List Fields\": %s,\n    \"Lists\": [" % json.dumps(LIST_FIELDS, ensure_ascii=False))
+        f.write(",".join("\n        " + json.dumps(list(metadata), ensure_ascii=False) for metadata in lists))
+        f.write("\n    ]\n}" if lists else "]\n}")
+    os.replace(path + ".part", path)
+    return cnt
+
+
+def iter_dict_encoded(path):
+    """
+    :param path:    <str> path of the json written by dump_dict_encoded()
+    :return:        <generator> of <dict> items, as before split_item(), read one by one
+    """
+    row_fields = list(iter_json_list(path, "Row Fields"))
+    lists = list(iter_json_list(path, "Lists"))
+    for row in iter_json_list(path, "Rows"):
+        item = dict(zip(LIST_FIELDS, lists[row[0]]))
+        item.update(zip(row_fields[1:], row[1:]))
+        yield item
+
+
+def dump_parquet(row_fields, rows, path):
+    """
+    write the rows as Parquet (requires pyarrow), the metadata of the name lists dictionary-encoded,
+    in row groups of PARQUET_BATCH_SIZE rows, so that the memory is bounded by a row group
+    :param row_fields:  <list> CACHE_ROW_FIELDS or RES_ROW_FIELDS
+    :param rows:        <iterable> of rows, as returned by split_item()
+    :param path:        <str> path of the Parquet
+    :return:            <int> number of rows written
+    """
+    schema = pyarrow.schema([(_k, pyarrow.dictionary(pyarrow.int32(), pyarrow.string())) for _k in LIST_FIELDS] +
+                            [(_k, pyarrow.string()) for _k in row_fields])
+    cnt = 0
+    with pyarrow.parquet.ParquetWriter(path + ".part", schema) as writer:
+        batch = []
+
+        def _write():
+            columns = list(zip(*[metadata + tuple(values) for metadata, values in batch]))
+            writer.write_batch(pyarrow.RecordBatch.from_arrays(
+                [pyarrow.array(_c, type=_f.type) for _c, _f in zip(columns, schema)], schema=schema))
+            batch.clear()
+
+        for row in rows:
+            batch.append(row)
+            cnt += 1
+            if len(batch) >= PARQUET_BATCH_SIZE:
+                _write()
+        if batch:
+            _write()
+    os.replace(path + ".part", path)
+    return cnt
+
+
 def strip_string(_str):
     if not _str:
         return ""
@@ -107,15 +301,15 @@ def dl():
 
 def parse_root_page():
     logger.debug("Handling Root URL ...")
-    page = urllib.request.urlopen(URL_ROOT).read()
-    soup = BeautifulSoup(page, features="html.parser")
+    page = REQUESTER.get(URL_ROOT)
+    doc = parse_html(page)
 
     # *** Declaration ***
     logger.debug("\tParsing Declaration ...")
-    declaration_wrapper = soup.select("div.pageMain > fieldset.helpInfo")[0]
-    _declaration_title = declaration_wrapper.select("legend")[0].text
+    declaration_wrapper = select(doc, "div.pageMain > fieldset.helpInfo")[0]
+    _declaration_title = text(select(declaration_wrapper, "legend")[0])
     declaration_title = strip_string(_declaration_title)  # result
-    _declaration_details = declaration_wrapper.select("ul")[0].text
+    _declaration_details = text(select(declaration_wrapper, "ul")[0])
     declaration_details = strip_string(_declaration_details)  # result
     # write declaration
     with open(os.path.join(FILE_DES_ROOT, FILE_DECL_NAME), "w", encoding="utf8") as f:
@@ -131,35 +325,35 @@ def parse_root_page():
                 "Source": URL_ROOT,
                 "Name Lists": []}
     logger.debug("\tParsing Events List ...")
-    comp_wrapper = soup.select("div.pageMain > table.styledTable")[0]
+    comp_wrapper = select(doc, "div.pageMain > table.styledTable")[0]
     # events table title
-    _comp_title = comp_wrapper.select("th")[0]
-    comp_title = strip_string(_comp_title.text)  # JSON result
+    _comp_title = select(comp_wrapper, "th")[0]
+    comp_title = strip_string(text(_comp_title))  # JSON result
     comp_res["Events Table Title"] = comp_title
     logger.debug("\t\tEvents Table Title Parsed")
     # events
     logger.debug("\t\tParsing Events Table ...")
-    _comps = comp_wrapper.select("td")
+    _comps = select(comp_wrapper, "td")
     _cnt_comp_sbj, _cnt_comp_comp, _cnt_comp_nl = -1, -1, -1
     _comp_crt_sbj, _comp_crt_comp = "", ""
     for _comp in _comps:
-        _attrs_comp = _comp.attrs.keys()
+        _attrs_comp = _comp.attrib.keys()
         if "rowspan" in _attrs_comp:  # subject
-            _comp_crt_sbj = strip_string(_comp.text)
+            _comp_crt_sbj = strip_string(text(_comp))
             _cnt_comp_sbj += 1
             _cnt_comp_comp, _cnt_comp_nl = 0, 0
             logger.debug("\t\t\tNew Subject: %s" % _comp_crt_sbj)
         elif "align" in _attrs_comp:  # event
-            _comp_crt_comp = strip_string(_comp.text)
+            _comp_crt_comp = strip_string(text(_comp))
             _cnt_comp_comp += 1
             _cnt_comp_nl = 0
             logger.debug("\t\t\t\tNew Event: %s" % _comp_crt_comp)
         else:  # namelist
             if "明天小小科学家" in _comp_crt_comp:  # Special Case
-                _c_wrapper = _comp.select("a")
+                _c_wrapper = select(_comp, "a")
                 for _c in _c_wrapper:
-                    _c_title = strip_string(_c.text)
-                    _c_href = url_rel_to_abs(_c["href"])
+                    _c_title = strip_string(text(_c))
+                    _c_href = url_rel_to_abs(_c.attrib["href"])
                     comp_res["Name Lists"].append({
                         "subject": _comp_crt_sbj, "event": _comp_crt_comp,
                         "name list": _c_title, "link": _c_href})
@@ -168,8 +362,8 @@ def parse_root_page():
                 continue
 
             try:
-                _c_title = strip_string(_comp.text)
-                _c_href = url_rel_to_abs(_comp.select("a")[0]["href"])
+                _c_title = strip_string(text(_comp))
+                _c_href = url_rel_to_abs(select(_comp, "a")[0].attrib["href"])
             except IndexError:  # empty table cell
                 logger.debug("\t\t\t\t\t#%d Skipped, Empty Table Cell" % _cnt_comp_nl)
             else:
@@ -195,23 +389,23 @@ def parse_root_page():
                 "Certificates": [],
                 "Failed": []}
     logger.debug("\tParsing & Saving Sample Certificates ...")
-    cert_wrapper = soup.select("div.pageMain > table.styledTable")[1]
+    cert_wrapper = select(doc, "div.pageMain > table.styledTable")[1]
     # certificate title
-    _cert_title = cert_wrapper.select("th")[0]
-    cert_title = strip_string(_cert_title.text)  # JSON result
+    _cert_title = select(cert_wrapper, "th")[0]
+    cert_title = strip_string(text(_cert_title))  # JSON result
     cert_res["Sample Certificates Title"] = cert_title
     logger.debug("\t\tSample Certificates Table Title Parsed")
     # certificates
     logger.debug("\t\tSaving Sample Certificates ...")
-    _certs = cert_wrapper.select("td")
+    _certs = select(cert_wrapper, "td")
     _cnt_cert = 0
     for _cert in _certs:
         try:
-            _c = _cert.select("a")[0]
-            _c_title = _c["title"]
-            _c_href = url_rel_to_abs(_c["href"])
+            _c = select(_cert, "a")[0]
+            _c_title = _c.attrib["title"]
+            _c_href = url_rel_to_abs(_c.attrib["href"])
             _c_fn = "%s-%s%s" % (cert_title, _c_title, _c_href[_c_href.rfind("."):])
-            _c_img = urllib.request.urlopen(_c_href).read()
+            _c_img = REQUESTER.get(_c_href)
             open(os.path.join(FILE_DES_ROOT, FILE_DES_CERT, _c_fn), "wb").write(_c_img)
         except IndexError:  # empty table cell
             logger.debug("\t\t\t#%d Skipped, Empty Table Cell" % _cnt_cert)
@@ -238,6 +432,52 @@ def parse_root_page():
     logger.debug("*** Root URL Handled ***")
 
 
+def fetch_name_list(lst_src):
+    """
+    :param lst_src:     <dict> source of a name list, {"subject", "event", "name list", "link"}
+    :return:            <tuple> (<bytes> page of the name list, <str> redirected link / None)
+    """
+    redirected_link = None
+    page = fetch(lst_src["link"])
+
+    # redirect, select "all" for area
+    if "<ul class=\"areaList\">" in page.decode():
+        doc = parse_html(page)
+        _redirected_link = select(doc, "ul.areaList > li > a")[0]
+        redirected_link = url_rel_to_abs(_redirected_link.attrib["href"])
+        if "全部" not in text(_redirected_link):
+            logger.error("TODO")
+        page = fetch(redirected_link)
+    return page, redirected_link
+
+
+def iter_name_list_items(page, lst_src, events_title, redirected_link):
+    """
+    rows of the table are parsed incrementally (see Selector.iter_matches()), one at a time,
+    so that the memory is flat whatever the size of the page
+    :param page:            <bytes> page of the name list, as returned by fetch_name_list()
+    :param lst_src:         <dict> source of the name list
+    :param events_title:    <str> title of the events table
+    :param redirected_link: <str> redirected link / None, as returned by fetch_name_list()
+    :return:                <generator> of <dict> items of the name list, as in the cache "Names Items"
+    """
+    wrapper = iter_matches(page, "div.pageMain > table.styledTable > tbody > tr")
+    next(wrapper, None)  # table head
+    for _item in wrapper:
+        item = select(_item, "td")
+        name = text(item[0])
+        school = text(item[1])
+        area = text(item[2])
+        prize = text(item[3])
+        yield {
+            "Events Table Title": events_title,
+            "Subject": lst_src["subject"],
+            "Event": lst_src["event"],
+            "Name List": lst_src["name list"],
+            "Link": lst_src["link"], "Redirected Link": redirected_link,
+            "name": name, "school": school, "area": area, "prize": prize}
+
+
 def crawl_name_list():
     logger.debug("Handling Name Lists ...")
     with open(os.path.join(FILE_DES_ROOT, FILE_NL_SRC_NAME), "r", encoding="utf8") as f:
@@ -247,60 +487,92 @@ def crawl_name_list():
     logger.debug("\tCrawling Name Lists ...")
     if LESS_CONSOLE_LOG:
         print("Name Lists Pages - Start Parsing ...")
-    for lst_src in tqdm(nm_lst_src):
-        redirected_link = None
-        fn = "%s-%s-%s.json" % (lst_src["subject"], lst_src["event"], lst_src["name list"])
-        page = urllib.request.urlopen(lst_src["link"]).read()
-        soup = BeautifulSoup(page, features="html.parser")
-
-        # redirect, select "all" for area
-        if "<ul class=\"areaList\">" in page.decode():
-            _redirected_link = soup.select("ul.areaList > li > a")[0]
-            redirected_link = url_rel_to_abs(_redirected_link["href"])
-            if "全部" not in _redirected_link.text:
-                logger.error("TODO")
-            page = urllib.request.urlopen(redirected_link).read()
-            soup = BeautifulSoup(page, features="html.parser")
-
-        lst_res = {"Fields": ["Fields", "Names Items"], "Names Items": []}
-        # parse page
-        wrapper = soup.select("div.pageMain > table.styledTable > tbody > tr")[1:]
-        for _item in wrapper:
-            item = _item.select("td")
-            name = item[0].text
-            school = item[1].text
-            area = item[2].text
-            prize = item[3].text
-            lst_res["Names Items"].append({
-                "Events Table Title": _nm_lst_src["Events Table Title"],
-                "Subject": lst_src["subject"],
-                "Event": lst_src["event"],
-                "Name List": lst_src["name list"],
-                "Link": lst_src["link"], "Redirected Link": redirected_link,
-                "name": name, "school": school, "area": area, "prize": prize})
-        with open(os.path.join(FILE_CACHE_PATH, fn), "w", encoding="utf8") as f:
-            json.dump(obj=lst_res, fp=f, indent=4, ensure_ascii=False)
+
+    def _handle(_lst_src, _page, _redirected_link):
+        fn = "%s-%s-%s.json" % (_lst_src["subject"], _lst_src["event"], _lst_src["name list"])
+        items = iter_name_list_items(_page, _lst_src, _nm_lst_src["Events Table Title"], _redirected_link)
+        if RES_COLUMNAR:
+            dump_dict_encoded(CACHE_ROW_FIELDS, (split_item(_item, CACHE_ROW_FIELDS) for _item in items),
+                              os.path.join(FILE_CACHE_PATH, fn))
+        else:
+            dump_json_stream({"Fields": ["Fields", "Names Items"]}, "Names Items", items,
+                             os.path.join(FILE_CACHE_PATH, fn))
+
+    if WORKERS > 1:  # pages fetched by a pool of threads, parsed in the order of arrival
+        # at most 2 * WORKERS pages are fetched or kept at a time, refilled as they are parsed
+        with ThreadPoolExecutor(max_workers=WORKERS) as executor, tqdm(total=len(nm_lst_src)) as bar:
+            pending = {}
+            for lst_src in nm_lst_src:
+                pending[executor.submit(fetch_name_list, lst_src)] = lst_src
+                if len(pending) < 2 * WORKERS:
+                    continue
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    _handle(pending.pop(future), *future.result())  # popped, so that the page is freed once parsed
+                    bar.update()
+            for future in as_completed(list(pending)):
+                _handle(pending.pop(future), *future.result())
+                bar.update()
+    else:
+        for lst_src in tqdm(nm_lst_src):
+            _handle(lst_src, *fetch_name_list(lst_src))
     logger.debug("*** Name Lists Crawled ***")
 
 
-def merge_as_json():
-    logger.debug("Merging Caches ...")
-    res = {"Fields": ["Fields", "Items"], "Itmes": []}
+def iter_merged_items():
+    """
+    :return:    <generator> of <dict> items of the results, read one by one from the caches
+    """
     for cache_file in os.listdir(FILE_CACHE_PATH):
-        with open(os.path.join(FILE_CACHE_PATH, cache_file), "r", encoding="utf8") as f:
-            cache = json.load(f)
-        for item in cache["Names Items"]:
-            res["Itmes"].append({
+        if not cache_file.endswith(".json"):  # e.g. ".part" of an interrupted write
+            continue
+        cnt = 0
+        cache_path = os.path.join(FILE_CACHE_PATH, cache_file)
+        for item in iter_dict_encoded(cache_path) if RES_COLUMNAR else iter_json_list(cache_path, "Names Items"):
+            cnt += 1
+            yield {
                 "Events Table Title": item["Events Table Title"],
                 "Subject": item["Subject"],
                 "Event": item["Event"],
                 "Name List": item["Name List"],
                 "Link": item["Link"], "Redirected Link": item["Redirected Link"],
                 "Name": item["name"],
-                "School": item["school"], "Area": item["area"], "Prize": item["prize"]})
-        logger.debug("\tMergd %d Items in File %s" % (len(cache["Names Items"]), cache_file))
-    with open(os.path.join(FILE_DES_ROOT, FILE_RES_NAME), "w", encoding="utf8") as f:
-        json.dump(obj=res, fp=f, indent=4, ensure_ascii=False)
+                "School": item["school"], "Area": item["area"], "Prize": item["prize"]}
+        logger.debug("\tMergd %d Items in File %s" % (cnt, cache_file))
+
+
+def merge_as_json():
+    """
+    results streamed from the caches to FILE_RES_NAME (and FILE_RES_JSONL_NAME if RES_JSONL), item by item
+    or, if RES_COLUMNAR, to FILE_RES_COLUMNAR_NAME, as Parquet if pyarrow installed, else dictionary-encoded json
+    """
+    logger.debug("Merging Caches ...")
+    items = iter_merged_items()
+    jsonl_path = os.path.join(FILE_DES_ROOT, FILE_RES_JSONL_NAME)
+    jsonl = open(jsonl_path + ".part", "w", encoding="utf8") if RES_JSONL else None
+
+    def _tee(_items):
+        for _item in _items:
+            jsonl.write(json.dumps(_item, ensure_ascii=False) + "\n")
+            yield _item
+
+    items = _tee(items) if RES_JSONL else items
+    try:
+        if not RES_COLUMNAR:
+            cnt = dump_json_stream({"Fields": ["Fields", "Items"]}, "Itmes", items,
+                                   os.path.join(FILE_DES_ROOT, FILE_RES_NAME))
+        elif pyarrow is not None:
+            cnt = dump_parquet(RES_ROW_FIELDS, (split_item(_item, RES_ROW_FIELDS) for _item in items),
+                               os.path.join(FILE_DES_ROOT, FILE_RES_COLUMNAR_NAME + ".parquet"))
+        else:
+            cnt = dump_dict_encoded(RES_ROW_FIELDS, (split_item(_item, RES_ROW_FIELDS) for _item in items),
+                                    os.path.join(FILE_DES_ROOT, FILE_RES_COLUMNAR_NAME + " (Dictionary Encoded).json"))
+    finally:
+        if RES_JSONL:
+            jsonl.close()
+    if RES_JSONL:
+        os.replace(jsonl_path + ".part", jsonl_path)
+    logger.debug("\t%d Items Merged" % cnt)
     if LESS_CONSOLE_LOG:
         print("Local - Caches Merged")
     logger.debug("*** Caches Merged ***")
@@ -0,0 +1,182 @@
+import gzip
+import socket
+import threading
+import time
+import http.client
+import urllib.error
+from urllib.parse import urlsplit, urljoin
+
+# Shared HTTP client of the crawlers, used instead of a bare "urllib.request.urlopen()",
+# which opens a new TCP connection (and TLS handshake) for every request.
+# Failures are raised as what "urlopen()" raises, so that the error handling of the callers is kept:
+#   urllib.error.HTTPError  response status >= 400 (e.g. 404), a redirect without "Location" header,
+#                           or more redirects than "max_redirects"
+#   urllib.error.URLError   connection failures (e.g. refused, DNS)
+#   socket.timeout          timed out
+
+
+class Response(object):
+    def __init__(self, url, status, reason, headers, body):
+        """
+        :param url:         <str> url of the response (after redirects)
+        :param status:      <int> status code
+        :param reason:      <str> reason phrase
+        :param headers:     <http.client.HTTPMessage> response headers
+        :param body:        <bytes> response body (decompressed)
+        """
+        self.url = url
+        self.status = status
+        self.reason = reason
+        self.headers = headers
+        self.body = body
+
+    def read(self):
+        return self.body
+
+
+class Requester(object):
+    REDIRECT_CODES = (301, 302, 303, 307, 308)
+
+    def __init__(self, timeout=10, max_retries=0, backoff=0.5, retry_statuses=(500, 502, 503, 504),
+                 pool_size=32, use_gzip=True, max_redirects=5, headers=None):
+        """
+        :param timeout:         <float> default timeout in seconds of each request
+        :param max_retries:     <int>   re-attempts after time-outs, connection failures and "retry_statuses"
+                                        [DEFAULT] 0 (callers with own retry loops)
+        :param backoff:         <float> sleep seconds before the n-th retry: backoff * 2 ** (n - 1)
+        :param retry_statuses:  <tuple> of <int> response statuses to retry
+        :param pool_size:       <int>   max idle (keep-alive) connections kept per host
+        :param use_gzip:        <bool>  whether to accept gzip encoded responses
+        :param max_redirects:   <int>   max redirects to follow, failed as an error response if exceeded
+        :param headers:         <dict>  extra headers of each request
+        """
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.retry_statuses = retry_statuses
+        self.pool_size = pool_size
+        self.use_gzip = use_gzip
+        self.max_redirects = max_redirects
+        self.headers = {"User-Agent": "Mozilla/5.0", "Connection": "keep-alive"}
+        if use_gzip:
+            self.headers["Accept-Encoding"] = "gzip"
+        if headers:
+            self.headers.update(headers)
+
+        self._pools = {}  # {(scheme, host, port): <list> of idle <http.client.HTTPConnection>}
+        self._lock = threading.Lock()
+
+    def _get_conn(self, key, timeout):
+        with self._lock:
+            pool = self._pools.setdefault(key, [])
+            conn = pool.pop() if pool else None
+        if conn is not None:
+            conn.timeout = timeout
+            if conn.sock is not None:
+                conn.sock.settimeout(timeout)
+            return conn, True
+        scheme, host, port = key
+        conn_cls = http.client.HTTPSConnection if "https" == scheme else http.client.HTTPConnection
+        return conn_cls(host, port, timeout=timeout), False
+
+    def _put_conn(self, key, conn):
+        with self._lock:
+            pool = self._pools.setdefault(key, [])
+            if len(pool) < self.pool_size:
+                pool.append(conn)
+                return
+        conn.close()
+
+    def _request_once(self, method, url, timeout):
+        """
+        send a single request through a pooled connection, re-sending once if the reused connection is stale
+        :return:    <Response>
+        """
+        parts = urlsplit(url)
+        key = (parts.scheme, parts.hostname, parts.port or (443 if "https" == parts.scheme else 80))
+        path = parts.path or "/"
+        if parts.query:
+            path += "?" + parts.query
+
+        while True:
+            conn, reused = self._get_conn(key, timeout)
+            try:
+                conn.request(method, path, headers=self.headers)
+                resp = conn.getresponse()
+                body = resp.read()
+            except (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError) as err:
+                conn.close()
+                if reused:  # closed by the server while idle, re-send with a new connection
+                    continue
+                raise urllib.error.URLError(err)
+            except socket.timeout:
+                conn.close()
+                raise
+            except (OSError, http.client.HTTPException) as err:
+                conn.close()
+                raise urllib.error.URLError(err)
+            break
+
+        if resp.will_close:
+            conn.close()
+        else:
+            self._put_conn(key, conn)
+        if "gzip" == resp.getheader("Content-Encoding"):
+            body = gzip.decompress(body)
+        return Response(url, resp.status, resp.reason, resp.headers, body)
+
+    def request(self, url, method="GET", timeout=None):
+        """
+        :param url:         <str> absolute url
+        :param method:      <str> "GET" or "HEAD"
+        :param timeout:     <float> timeout in seconds, None for the default one
+        :return:            <Response>
+        """
+        timeout = self.timeout if timeout is None else timeout
+        attempts = 0
+        while True:
+            try:
+                resp = self._request_once(method, url, timeout)
+                redirects = 0
+                while resp.status in self.REDIRECT_CODES and redirects < self.max_redirects:
+                    location = resp.headers["Location"]
+                    if location is None:  # nowhere to follow, failed as an error response
+                        raise urllib.error.HTTPError(url, resp.status, "Redirect Without Location Header",
+                                                     resp.headers, None)
+                    url = urljoin(url, location)
+                    resp = self._request_once("HEAD" if "HEAD" == method else "GET", url, timeout)
+                    redirects += 1
+                if resp.status in self.retry_statuses and attempts < self.max_retries:
+                    raise urllib.error.HTTPError(url, resp.status, resp.reason, resp.headers, None)
+            except (socket.timeout, urllib.error.URLError):  # HTTPError included
+                attempts += 1
+                if attempts > self.max_retries:
+                    raise
+                time.sleep(self.backoff * 2 ** (attempts - 1))
+                continue
+            break
+
+        if resp.status >= 400:
+            raise urllib.error.HTTPError(url, resp.status, resp.reason, resp.headers, None)
+        if resp.status in self.REDIRECT_CODES:  # still redirected after self.max_redirects
+            raise urllib.error.HTTPError(url, resp.status, "Too Many Redirects", resp.headers, None)
+        return resp
+
+    def get(self, url, timeout=None):
+        """
+        :return:    <bytes> response body
+        """
+        return self.request(url, timeout=timeout).body
+
+    def head(self, url, timeout=None):
+        """
+        :return:    <int> response status
+        """
+        return self.request(url, method="HEAD", timeout=timeout).status
+
+    def close(self):
+        with self._lock:
+            for pool in self._pools.values():
+                for conn in pool:
+                    conn.close()
+            self._pools.clear()
@@ -0,0 +1,205 @@
+import re
+import time
+import functools
+from lxml import etree
+import lxml.html
+
+# Shared HTML parsing layer of the crawlers, used instead of "BeautifulSoup(page, features="html.parser")",
+# whose pure-Python tree building dominates the crawls of large pages.
+# Pages are parsed by lxml (libxml2), CSS selectors are compiled once to XPath. Only the subset used is supported:
+#   tag names, ".class" (any number), descendant (" ") and child (">") combinators
+# e.g. "div.pageMain > table.styledTable > tbody > tr", "table.table.table-hover tr", ".page-body > p > a"
+# results are as "BeautifulSoup.select()": elements in document order, without duplicates
+# trees differ on elements closed implicitly (e.g. <p> by <table>, unclosed <td>, <li>), built as by the browsers
+# instead of nested as by "html.parser", see check_equivalence()
+# large pages may be parsed incrementally by iter_matches(), whose elements are freed once handled
+
+_COMPOUND = re.compile(r"^([a-zA-Z][a-zA-Z0-9]*|\*)?((?:\.[-\w]+)*)$")
+
+
+def _parse_selector(selector):
+    """
+    :return:    <list> of (<bool> child of the previous step, <str> XPath node test with the class predicates)
+    """
+    steps = []
+    child = False
+    for token in selector.replace(">", " > ").split():
+        if ">" == token:
+            child = True
+            continue
+        match = _COMPOUND.match(token)
+        if not match or not steps and child:
+            raise ValueError("Unsupported Selector: %s" % selector)
+        predicates = "".join("[contains(concat(' ', normalize-space(@class), ' '), ' %s ')]" % _class
+                             for _class in match.group(2).split(".")[1:])
+        steps.append((child, (match.group(1) or "*").lower() + predicates))
+        child = False
+    if not steps or child:
+        raise ValueError("Unsupported Selector: %s" % selector)
+    return steps
+
+
+@functools.lru_cache(maxsize=None)
+def compile_selector(selector):
+    """
+    :param selector:    <str> CSS selector
+    :return:            <lxml.etree.XPath> matching the descendants of the context node
+    """
+    return etree.XPath("/".join(("child::" if child else "descendant::") + test
+                                for child, test in _parse_selector(selector)))
+
+
+@functools.lru_cache(maxsize=None)
+def compile_matcher(selector):
+    """
+    :param selector:    <str> CSS selector
+    :return:            <lxml.etree.XPath> non-empty on the context node if it matches "selector",
+                        checked only against its ancestors (so that the rest of the document is not needed)
+    """
+    steps = _parse_selector(selector)
+    condition = steps[0][1]
+    for (child, test) in steps[1:]:
+        condition = "%s[%s::%s]" % (test, "parent" if child else "ancestor", condition)
+    return etree.XPath("self::" + condition)
+
+
+def parse_html(page):
+    """
+    :param page:    <bytes> (decoded as utf8, or by the declared charset if not utf8) or <str> HTML page
+    :return:        <lxml.etree._ElementTree> document, to select from
+    """
+    if isinstance(page, bytes):
+        try:
+            page = page.decode("utf8")
+        except UnicodeDecodeError:  # left to lxml
+            pass
+    try:
+        return lxml.html.document_fromstring(page).getroottree()
+    except etree.ParserError:  # empty document
+        return lxml.html.document_fromstring("<html></html>").getroottree()
+
+
+def select(node, selector):
+    """
+    :param node:        document (as returned by parse_html()) or <lxml.html.HtmlElement>
+    :param selector:    <str> CSS selector, see compile_selector()
+    :return:            <list> of <lxml.html.HtmlElement> descendants of "node" matched
+    """
+    return compile_selector(selector)(node)
+
+
+def iter_matches(page, selector, chunk_size=65536, encoding="utf8"):
+    """
+    parse "page" incrementally, yielding the elements matching "selector" as soon as they are closed,
+    so that the memory is bounded by the size of an element instead of the whole document:
+    every element of the tag is freed after being handled (along with the siblings before it),
+    thus nested matches (e.g. a row of a table inside a row) are not supported
+    :param page:        <bytes> (chunks fed as they are, decoded by the parser) or <str> HTML page
+    :param selector:    <str> CSS selector, see compile_selector()
+    :param chunk_size:  <int> size of the chunks fed to the parser
+    :param encoding:    <str> encoding of a <bytes> page, None for the declared charset (left to lxml)
+    :return:            <generator> of <lxml.html.HtmlElement> matched, in document order
+    """
+    tag = _COMPOUND.match(selector.replace(">", " ").split()[-1]).group(1) or "*"
+    matcher = compile_matcher(selector)
+    parser = etree.HTMLPullParser(events=("end",), tag=tag.lower(),
+                                  encoding=encoding if isinstance(page, bytes) else None)
+    parser.set_element_class_lookup(lxml.html.HtmlElementClassLookup())
+
+    def _handle_events():
+        for _, element in parser.read_events():
+            if matcher(element):
+                yield element
+            element.clear()
+            while element.getprevious() is not None:
+                del element.getparent()[0]
+
+    for start in range(0, len(page), chunk_size):
+        parser.feed(page[start:start + chunk_size])
+        yield from _handle_events()
+    parser.close()
+    yield from _handle_events()
+
+
+def text(node):
+    """
+    :param node:    document or <lxml.html.HtmlElement>
+    :return:        <str> all the text inside "node", as "Tag.text" of BeautifulSoup
+    """
+    if isinstance(node, etree._ElementTree):
+        node = node.getroot()
+    return str(node.text_content())
+
+
+def check_equivalence(pages, selectors):
+    """
+    compare the matches of "selectors" with those of BeautifulSoup ("html.parser") on saved pages
+    :param pages:       <list> of <str> paths of saved HTML pages
+    :param selectors:   <list> of <str> CSS selectors
+    :return:            <list> of (<str> page, <str> selector, <str> description) mismatches, empty if identical
+    """
+    from bs4 import BeautifulSoup
+
+    mismatches = []
+    for path in pages:
+        page = open(path, "rb").read()
+        soup, doc = BeautifulSoup(page, features="html.parser"), parse_html(page)
+        for selector in selectors:
+            expected = [(_el.name, _el.attrs, _el.text) for _el in soup.select(selector)]
+            got = [(_el.tag, dict(_el.attrib), text(_el)) for _el in select(doc, selector)]
+            for _exp, _got in zip(expected, got):
+                _exp = (_exp[0], {_k: " ".join(_v) if isinstance(_v, list) else _v for _k, _v in _exp[1].items()},
+                        _exp[2])
+                if _exp != _got:
+                    mismatches.append((path, selector, "%r => %r" % (_exp, _got)))
+                    break
+            if len(expected) != len(got):
+                mismatches.append((path, selector, "%d => %d matches" % (len(expected), len(got))))
+    print("[EQUIVALENCE]\t%d page(s), %d selector(s), %d mismatch(es)" % (len(pages), len(selectors), len(mismatches)))
+    for mismatch in mismatches:
+        print("\t%s\t%s\t%s" % mismatch)
+    return mismatches
+
+
+def benchmark(pages, selectors, repeat=10):
+    """
+    time parsing the saved pages and selecting "selectors" (with texts of the matches), against BeautifulSoup
+    :return:    <tuple> (<float> seconds of BeautifulSoup, <float> seconds of this layer), per page
+    """
+    from bs4 import BeautifulSoup
+
+    contents = [open(path, "rb").read() for path in pages]
+    start = time.time()
+    for _ in range(repeat):
+        for page in contents:
+            soup = BeautifulSoup(page, features="html.parser")
+            for selector in selectors:
+                [_el.text for _el in soup.select(selector)]
+    bs_time = (time.time() - start) / repeat / len(contents)
+    start = time.time()
+    for _ in range(repeat):
+        for page in contents:
+            doc = parse_html(page)
+            for selector in selectors:
+                [text(_el) for _el in select(doc, selector)]
+    lxml_time = (time.time() - start) / repeat / len(contents)
+    print("[BENCHMARK]\tBeautifulSoup %.1fms\tlxml %.1fms\t(%.1fx) per page"
+          % (bs_time * 1000., lxml_time * 1000., bs_time / lxml_time if lxml_time else 0.))
+    return bs_time, lxml_time
+
+
+if __name__ == "__main__":
+    # # Name List Pages of the High School Rewards Crawler, saved by hand
+    # PAGES = [r"...\saved pages\name list 1.html", r"...\saved pages\name list 2.html"]
+    # SELECTORS = ["div.pageMain > table.styledTable > tbody > tr", "ul.areaList > li > a", "td"]
+    # check_equivalence(PAGES, SELECTORS)
+    # benchmark(PAGES, SELECTORS)
+
+    # # Name List Pages of the Zhiyuan Namelist Crawler, saved with SAVE_PAGE = True
+    # PAGES = [r"...\20200422 Zhiyuan Namelist\data\致远学院学生名册 - 20200422\数学 2013.html"]
+    # SELECTORS = [".page-body > p > a", "ul.breadcrumb > li.active", "table.table.table-hover tr",
+    #              "td", "h3", "div > p", "div", "img"]
+    # check_equivalence(PAGES, SELECTORS)
+    # benchmark(PAGES, SELECTORS)
+
+    print("Please edit annotations to start executions.")
@@ -0,0 +1,63 @@
+import os
+import sys
+import threading
+import urllib.error
+from http.server import HTTPServer, BaseHTTPRequestHandler
+import pytest
+
+TESTS_PATH = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.join(TESTS_PATH, ".."))  # shared modules
+from Requester import Requester
+
+
+class RedirectHandler(BaseHTTPRequestHandler):
+    # /<n>      redirected to /<n - 1>, down to /0 of the content
+    # /missing  redirected without "Location" header
+    def do_GET(self):
+        name = self.path.strip("/")
+        if "0" == name:
+            body = b"content"
+            self.send_response(200)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+            return
+        self.send_response(302)
+        if "missing" != name:
+            self.send_header("Location", "/%d" % (int(name) - 1))
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture(scope="module")
+def server_url():
+    server = HTTPServer(("127.0.0.1", 0), RedirectHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield "http://127.0.0.1:%d/" % server.server_address[1]
+    server.shutdown()
+    server.server_close()
+
+
+def test_redirects_followed(server_url):
+    requester = Requester(max_redirects=3)
+    assert requester.get(server_url + "3") == b"content"
+    requester.close()
+
+
+def test_too_many_redirects(server_url):
+    requester = Requester(max_redirects=3)
+    with pytest.raises(urllib.error.HTTPError) as err:
+        requester.get(server_url + "4")
+    assert 302 == err.value.code
+    requester.close()
+
+
+def test_redirect_without_location(server_url):
+    requester = Requester()
+    with pytest.raises(urllib.error.HTTPError) as err:
+        requester.get(server_url + "missing")
+    assert 302 == err.value.code
+    requester.close()
@@ -0,0 +1,56 @@
+import os
+import sys
+
+TESTS_PATH = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.join(TESTS_PATH, ".."))  # shared modules
+from Selector import parse_html, select, iter_matches, text, check_equivalence
+
+# pages in the layouts of the crawled sites:
+#   high_school_*    root page, name list page and area list page (redirecting to the whole list) of the High School
+#                    Rewards Crawler
+#   zhiyuan_*        name list page of the Zhiyuan Namelist Crawler (with the breadcrumb, images and paragraphs)
+# with the markup of the sites around the parts crawled (unclosed items of the menus, scripts, comments, entities)
+FIXTURES_PATH = os.path.join(TESTS_PATH, "fixtures")
+PAGES = [os.path.join(FIXTURES_PATH, _f) for _f in sorted(os.listdir(FIXTURES_PATH))
+         if _f.startswith(("high_school_", "zhiyuan_"))]
+# elements closed implicitly (<p> by <table>, <td>, <tr> and <li> by their siblings), nested by "html.parser"
+MALFORMED_PAGE = os.path.join(FIXTURES_PATH, "malformed.html")
+# selectors of the crawlers
+SELECTORS = ["div.pageMain > fieldset.helpInfo", "legend", "ul", "div.pageMain > table.styledTable", "th", "a",
+             "div.pageMain > table.styledTable > tbody > tr", "ul.areaList > li > a", "td",
+             ".page-body > p > a", "ul.breadcrumb > li.active", "table.table.table-hover tr", "h3", "div > p", "div",
+             "img"]
+ROWS = "div.pageMain > table.styledTable > tbody > tr"
+
+
+def test_select_as_beautifulsoup():
+    """
+    the matches of select() (tags, attributes and texts) are those of BeautifulSoup ("html.parser")
+    """
+    assert check_equivalence(PAGES, SELECTORS) == []
+
+
+def test_iter_matches_as_select():
+    """
+    the rows parsed incrementally are those selected on the whole page, even if the chunks split the characters
+    """
+    for path in PAGES:
+        with open(path, "rb") as f:
+            page = f.read()
+        expected = [text(_el) for _el in select(parse_html(page), ROWS)]
+        for chunk_size in (7, 65536):
+            assert [text(_el) for _el in iter_matches(page, ROWS, chunk_size=chunk_size)] == expected
+
+
+def test_malformed_as_browsers():
+    """
+    on elements closed implicitly, the tree is built as by the browsers (HTML parsing rules of lxml),
+    instead of nested as by BeautifulSoup ("html.parser"), whose matches differ then
+    """
+    selectors = ["div.pageMain > table.styledTable", "td", "ul.areaList > li > a"]
+    assert set(selectors) == set(_selector for _, _selector, _ in check_equivalence([MALFORMED_PAGE], selectors))
+    with open(MALFORMED_PAGE, "rb") as f:
+        doc = parse_html(f.read())
+    assert 1 == len(select(doc, "div.pageMain > table.styledTable"))
+    assert ["数学", "名单 1", "名单 2", "物理", "名单 3", ""] == [text(_el).strip() for _el in select(doc, "td")]
+    assert ["全部", "北京"] == [text(_el) for _el in select(doc, "ul.areaList > li > a")]